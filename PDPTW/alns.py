@@ -1,13 +1,14 @@
 import random, time
-import xlsxwriter
 
 import numpy as np
-import pandas as pd
 from numpy import log as ln
-import matplotlib.pyplot as plt
 
+from batchevaluator import BatchEvaluator
+from checkpoint import saveCheckpoint, loadCheckpoint
 from destroy import Destroy
-from solution import Solution
+from eventsinks import NullSink
+from history import History
+from solution import Solution, buildSolution
 from repair import Repair
 from parameters import Parameters
 
@@ -21,9 +22,9 @@ class ALNS:
     problem : PDPTW
         The problem instance that we want to solve.
     nDestroyOps : int
-        number of destroy operators.
+        number of destroy operators, must equal the number of enabled destroy operators, or None
     nRepairOps : int
-        number of repair operators.
+        number of repair operators, must equal the number of enabled repair operators, or None
     randomGen : Random
         random number generator
     currentSolution : Solution
@@ -32,13 +33,89 @@ class ALNS:
         The best solution currently found
     bestDistance : int
         Distance of the best solution
+    useUndoLog : boolean
+        if True, destroy and repair modify the current solution directly and a rejected
+        candidate is rolled back with the undo log of the solution instead of copying
+        the current solution every iteration
+    validateUndoLog : boolean
+        if True, every rollback is checked against the solution before the changes
+        and against a fresh recompute of the routes (slow, for debugging)
+    randomSeed : int
+        seed of the random number generator, Parameters.randomSeed if None
+    timeLimit : float
+        maximum wall-clock time of execute in seconds, no limit if None
+    maxNonImprovingIterations : int
+        stop after this number of iterations without a new best solution, no limit if None
+    targetObjective : float
+        stop as soon as the distance of the best solution is at most this value, None to disable
+    minTemperature : float
+        stop when the temperature drops below this value, None to disable
+    stopReason : string
+        the criterion that stopped the last execute: 'iterations', 'time', 'stagnation',
+        'target' or 'temperature'
+    batchSize : int
+        number of candidates per iteration, if larger than 1 the candidates are evaluated
+        in parallel against the same current solution by a BatchEvaluator
+    nWorkers : int
+        number of worker processes of the BatchEvaluator, the number of CPUs if None
+    destroyOperators : OperatorRegistry
+        the destroy operators and their statistics, Destroy.createRegistry() if None
+    repairOperators : OperatorRegistry
+        the repair operators and their statistics, Repair.createRegistry() if None
+    destroyOps, repairOps : Lists of Operators
+        the enabled operators, indexed by operator number
+    timeAwareWeights : boolean
+        if True, the score of an operator per call is divided by its mean time relative to
+        the mean time of all operators of its kind, so that the weights follow the score per second
+    checkpointFile : string
+        if not None, the state of the search is written to this .npz file every
+        checkpointInterval iterations, execute(checkpoint = checkpointFile) resumes from it
+    checkpointInterval : int
+        number of iterations between two checkpoints
+    eventSink : NullSink
+        receives an event after every iteration, see eventsinks, NullSink() if None
+    historyFile : string
+        .npz file to which the history is written at the end of execute when
+        register_objective_value_over_time or register_weights_over_time is set
+    history : History
+        objective value and operator weights per iteration
     """
 
-    def __init__(self, problem, nDestroyOps, nRepairOps, nIterations, minSizeNBH, maxPercentageNHB, tau, coolingRate, decayParameter, noise):
+    def __init__(self, problem, nDestroyOps, nRepairOps, nIterations, minSizeNBH, maxPercentageNHB, tau, coolingRate, decayParameter, noise,
+                 useUndoLog = False, validateUndoLog = False, randomSeed = None, timeLimit = None,
+                 maxNonImprovingIterations = None, targetObjective = None, minTemperature = None,
+                 batchSize = 1, nWorkers = None, destroyOperators = None, repairOperators = None,
+                 timeAwareWeights = False, checkpointFile = None, checkpointInterval = 100, eventSink = None,
+                 historyFile = 'history.npz'):
         self.problem = problem
+        self.destroyOperators = Destroy.createRegistry() if destroyOperators is None else destroyOperators
+        self.repairOperators = Repair.createRegistry() if repairOperators is None else repairOperators
+        self.destroyOps = self.destroyOperators.enabledOperators()
+        self.repairOps = self.repairOperators.enabledOperators()
+        if nDestroyOps is None:
+            nDestroyOps = len(self.destroyOps)
+        if nRepairOps is None:
+            nRepairOps = len(self.repairOps)
+        if nDestroyOps != len(self.destroyOps) or nRepairOps != len(self.repairOps):
+            raise ValueError("nDestroyOps and nRepairOps must equal the number of enabled operators, " +
+                             str(len(self.destroyOps)) + " destroy and " + str(len(self.repairOps)) + " repair")
         self.nDestroyOps = nDestroyOps
         self.nRepairOps = nRepairOps
-        self.randomGen = random.Random(Parameters.randomSeed)  # used for reproducibility
+        self.randomSeed = Parameters.randomSeed if randomSeed is None else randomSeed
+        self.randomGen = random.Random(self.randomSeed)  # used for reproducibility
+        self.timeLimit = timeLimit
+        self.maxNonImprovingIterations = maxNonImprovingIterations
+        self.targetObjective = targetObjective
+        self.minTemperature = minTemperature
+        self.stopReason = None
+        self.batchSize = batchSize
+        self.nWorkers = nWorkers
+        self.batchEvaluator = None
+        self.timeAwareWeights = timeAwareWeights
+        self.checkpointFile = checkpointFile
+        self.checkpointInterval = checkpointInterval
+        self.eventSink = NullSink() if eventSink is None else eventSink
+        self.historyFile = historyFile
 
         self.wDestroy = [1 for i in range(nDestroyOps)]  # weights of the destroy operators
         self.wRepair = [1 for i in range(nRepairOps)]  # weights of the repair operators
@@ -56,13 +133,17 @@ class ALNS:
         self.decayParameter = decayParameter
         self.noise = noise
 
+        # Define max neighborhood size
+        number_of_request = len(self.problem.requests)
+        self.maxSizeNBH = max(1, int(np.floor(self.maxPercentageNHB/100*number_of_request)))
+
+        self.useUndoLog = useUndoLog
+        self.validateUndoLog = validateUndoLog
+
         # Presenting results
         self.register_weights_over_time = False
-        self.removal_weights_per_iteration = []
-        self.insertion_weights_per_iteration = []
-        
         self.register_objective_value_over_time = False
-        self.list_objective_values = []
+        self.history = None
 
     def printWeight(self):
         print('wDestroy', end = ' ')
@@ -78,6 +159,14 @@ class ALNS:
         """
         Method that constructs an initial solution using random insertion
         """
+        self.starttime = time.time()
+        self.starttime_best_objective = self.starttime
+        self.time_best_objective_found = self.starttime_best_objective
+        self.optimal_iteration_number = 0
+        self.nIterationsDone = 0
+        self.real_dist = np.inf
+        self.history = self.createHistory()
+
         self.currentSolution = Solution(self.problem, list(), list(), list(self.problem.requests.copy()))
         self.currentSolution.executeRandomInsertion(self.randomGen)
         self.currentSolution.computeDistance()
@@ -90,10 +179,6 @@ class ALNS:
         # self.currentSolution.print()
         # print("Created initial solution with distance: " + str(self.bestDistance))
         
-        # Define max neighborhood size
-        number_of_request = len(self.problem.requests)
-        self.maxSizeNBH = max(1, int(np.floor(self.maxPercentageNHB/100*number_of_request)))
-
         # Find starting temperature
         self.T = self.findStartingTemperature(self.tau, self.bestDistance)
 
@@ -103,116 +188,136 @@ class ALNS:
         return round(T, 4)
             
 
-    def execute(self):
+    def execute(self, checkpoint = None):
         """
         Method that executes the ALNS
+
+        Parameters
+        ----------
+        checkpoint : string
+            file written by a run with the same parameters, the search resumes from
+            its state and follows the same trajectory as the run that wrote it
         """
         starttime = time.time()  # get the start time
-        self.starttime_best_objective = time.time()
-        self.real_dist = np.inf
         
-        self.constructInitialSolution()
+        if checkpoint is None:
+            self.constructInitialSolution()
+            i = 0
+        else:
+            i = loadCheckpoint(self, checkpoint)
         
-        for i in range(self.nIterations):
-            self.max_arc_length = self.currentSolution.calculateMaxArc()
-            # Simulated annealing
-            self.iteration_number = i
-            self.checkIfAcceptNewSol()
-            print(f'Iteration number {i}')
-            # Print solution per iteration
-            objective_value =  self.tempSolution.distance
-            # print("Iteration " + str(i) + ": Found solution with distance: " + str(objective_value))
-
-            
-            # To plot weights of the operators over time 
-            if self.register_weights_over_time:
-                self.removal_weights_per_iteration.append(self.wDestroyPlot)
-                self.insertion_weights_per_iteration.append(self.wDestroyPlot)
-            
-            # To plot objective values over time
-            if self.register_objective_value_over_time:
-                self.list_objective_values.append(objective_value)
+        while True:
+            self.stopReason = self.checkTermination(i)
+            if self.stopReason is not None:
+                break
+            self.executeIteration(i)
+            i += 1
+            if self.checkpointFile is not None and i % self.checkpointInterval == 0:
+                saveCheckpoint(self, self.checkpointFile, i)
+        self.finish()
                 
         # print(self.wDestroy)
         # print(self.wRepair)
         endtime = time.time()  # get the end time
         cpuTime = round(endtime - starttime, 3)
+        self.cpuTime = cpuTime
         
         # Print status at termination
-        print("Terminated. Final distance: " + str(self.bestSolution.distance) + ", cpuTime: " + str(cpuTime) + " seconds")
+        print("Terminated (" + self.stopReason + "). Final distance: " + str(self.bestSolution.distance) + ", cpuTime: " + str(cpuTime) + " seconds")
         
         time_best_objective = self.time_best_objective_found - self.starttime_best_objective
         
         print(f'Best objective value found after: {round(time_best_objective, 3)} seconds')
         
         print(f'Best objective value found after: {self.optimal_iteration_number} iterations')
+
+        self.destroyOperators.printStatistics('Destroy operator', self.destroyScore, self.destroyUseTimes, self.wDestroy)
+        self.repairOperators.printStatistics('Repair operator', self.repairScore, self.repairUseTimes, self.wRepair)
         
         # print(self.repairUseTimes)
 
-        # Plot weights of the operators over time 
-        if self.register_weights_over_time:
-            iterations_list = np.arange(0, self.nIterations)
-                        
-            weight_removal1 = [round(weight[0], 4) for weight in self.removal_weights_per_iteration]
-            weight_removal2 = [round(weight[1], 4) for weight in self.removal_weights_per_iteration]
-            weight_removal3 = [round(weight[2], 4) for weight in self.removal_weights_per_iteration]
-            weight_removal4 = [round(weight[3], 4) for weight in self.removal_weights_per_iteration]
-            weight_removal5 = [round(weight[4], 4) for weight in self.removal_weights_per_iteration]
-            weight_removal6 = [round(weight[5], 4) for weight in self.removal_weights_per_iteration]
-            weight_removal7 = [round(weight[6], 4) for weight in self.removal_weights_per_iteration]
-            weight_removal8 = [round(weight[7], 4) for weight in self.removal_weights_per_iteration]
-            weight_removal9 = [round(weight[8], 4) for weight in self.removal_weights_per_iteration]
-            
-            plt.plot(iterations_list, weight_removal1, label="Random request")
-            plt.plot(iterations_list, weight_removal2, label="Worst-distance")
-            plt.plot(iterations_list, weight_removal3, label="Worst-time")
-            plt.plot(iterations_list, weight_removal4, label="Random route")
-            plt.plot(iterations_list, weight_removal5, label="Shaw")
-            plt.plot(iterations_list, weight_removal6, label="Promixity-based")
-            plt.plot(iterations_list, weight_removal7, label="Time-based")
-            plt.plot(iterations_list, weight_removal8, label="Demand-based")
-            plt.plot(iterations_list, weight_removal9, label="Worst-neighborhood")
-            plt.xlabel('Iteration number', fontsize=12)
-            plt.ylabel('Weight', fontsize=12)
-            plt.legend(loc="upper right", fontsize='small')
-            plt.show()
-            
-            
-            weight_insertion1 = [round(weight[0], 4) for weight in self.removal_weights_per_iteration]
-            weight_insertion2 = [round(weight[1], 4) for weight in self.removal_weights_per_iteration]
-            weight_insertion3 = [round(weight[2], 4) for weight in self.removal_weights_per_iteration]
-
-            plt.plot(iterations_list, weight_insertion1, label="Random request")
-            plt.plot(iterations_list, weight_insertion2, label="Basic greedy")
-            plt.plot(iterations_list, weight_insertion3, label="Regret")
-            plt.xlabel('Iteration number', fontsize=12)
-            plt.ylabel('Weight', fontsize=12)
-            plt.legend(loc="upper right", fontsize='small')
-            plt.show()
-            
-        # Plot objective values over time
-        if self.register_objective_value_over_time:
-            iterations_list = np.arange(0, self.nIterations)
-            objective_values = [int(value) for value in self.list_objective_values]
-            
-            df = pd.DataFrame(objective_values)
-            writer = pd.ExcelWriter('Objective values.xlsx', engine='xlsxwriter')
-            df.to_excel(writer, sheet_name='1', index=False)
-            writer.save()
-            
-            plt.plot(iterations_list, self.list_objective_values)
+    def finish(self):
+        """
+        Method that ends a run: stops the worker processes of the batch evaluator,
+        closes the event sink and saves the history
+        """
+        self.closeBatchEvaluator()
+        self.eventSink.close()
+
+        # Save the objective values and weights of the operators over time, plot_history.py plots them
+        # and write_objective_values.py writes the objective values to Excel
+        if self.register_weights_over_time or self.register_objective_value_over_time:
+            self.history.save(self.historyFile, [operator.name for operator in self.destroyOps],
+                              [operator.name for operator in self.repairOps])
 
-            plt.xlabel('Iteration number', fontsize=12)
-            plt.ylabel('Objective value', fontsize=12)
-            plt.show()
+    def createHistory(self):
+        """
+        Method that creates the history, with room for all iterations unless the run
+        is limited by time, then it grows in chunks
+        """
+        if not (self.register_weights_over_time or self.register_objective_value_over_time):
+            capacity = 0
+        elif self.timeLimit is None:
+            capacity = self.nIterations
+        else:
+            capacity = min(self.nIterations, Parameters.historyChunkSize)
+        return History(self.nDestroyOps, self.nRepairOps, capacity, Parameters.historyChunkSize)
             
+    def checkTermination(self, i):
+        """
+        Method that checks the termination criteria before iteration i. Returns the
+        reason to stop, None if the search continues.
+        """
+        if i >= self.nIterations:
+            return 'iterations'
+        if self.timeLimit is not None and time.time() - self.starttime >= self.timeLimit:
+            return 'time'
+        if self.maxNonImprovingIterations is not None and i - self.optimal_iteration_number >= self.maxNonImprovingIterations:
+            return 'stagnation'
+        if self.targetObjective is not None and self.bestSolution.distance <= self.targetObjective:
+            return 'target'
+        if self.minTemperature is not None and self.T < self.minTemperature:
+            return 'temperature'
+        return None
+
+    def executeIteration(self, i):
+        """
+        Method that executes iteration i of the ALNS, after constructInitialSolution
+        """
+        self.max_arc_length = self.currentSolution.calculateMaxArc()
+        # Simulated annealing
+        self.iteration_number = i
+        if self.batchSize > 1:
+            self.checkIfAcceptBatch()
+        else:
+            self.checkIfAcceptNewSol()
+        if self.eventSink.active:
+            self.eventSink.iteration(i, self.destroyOpNr, self.repairOpNr, self.sizeNBH, self.candidateDistance,
+                                     self.currentSolution.distance, self.bestSolution.distance, self.accepted, self.T,
+                                     time.time() - self.starttime)
+        # Print solution per iteration
+        objective_value =  self.candidateDistance
+        # print("Iteration " + str(i) + ": Found solution with distance: " + str(objective_value))
+
+        
+        # To plot objective values and weights of the operators over time
+        if self.register_weights_over_time or self.register_objective_value_over_time:
+            self.history.record(objective_value, self.wDestroy, self.wRepair)
+        self.nIterationsDone = i + 1
+
     # @Log('time_output.csv')
     def checkIfAcceptNewSol(self):
         """
         Method that checks if we accept the newly found solution
         """
-        # Copy the current solution
-        self.tempSolution = self.currentSolution.copy()
+        if self.useUndoLog:
+            # Change the current solution directly and record the changes
+            self.tempSolution = self.currentSolution
+            self.tempSolution.startJournal(self.validateUndoLog)
+        else:
+            # Copy the current solution
+            self.tempSolution = self.currentSolution.copy()
+        currentDistance = self.currentSolution.distance
         # print('before change ')
         # self.tempSolution.print()
         # decide on the size of the neighbourhood
@@ -221,6 +326,8 @@ class ALNS:
         # print('destroyOpNr ', destroyOpNr)
         repairOpNr = self.determineRepairOpNr()
         # print('repairOpNr ', repairOpNr)
+        self.sizeNBH, self.destroyOpNr, self.repairOpNr = sizeNBH, destroyOpNr, repairOpNr
+        self.accepted = False
         self.destroyAndRepair(destroyOpNr, repairOpNr, sizeNBH)
 
         # print('after destroy and repair ')
@@ -228,17 +335,17 @@ class ALNS:
 
         # (self.tempSolution.computeDistance())
 
-        self.tempSolution.computeDistanceWithNoise(self.max_arc_length, self.noise, self.randomGen)
+        self.candidateDistance = self.tempSolution.computeDistanceWithNoise(self.max_arc_length, self.noise, self.randomGen)
 
-        if self.tempSolution.distance < self.currentSolution.distance:
+        if self.candidateDistance < currentDistance:
             if self.tempSolution.distanceType == 0:
                 self.tempSolution.no_noise_succesful +=1
             elif self.tempSolution.distanceType == 1:
                 self.tempSolution.noise_succesful +=1
-            self.currentSolution = self.tempSolution.copy()
+            self.acceptTempSolution()
             # we found a global best solution
-            if self.tempSolution.distance < self.bestDistance:  # update best solution
-                self.bestDistance = self.tempSolution.distance
+            if self.candidateDistance < self.bestDistance:  # update best solution
+                self.bestDistance = self.candidateDistance
                 self.bestSolution = self.tempSolution.copy()
                 self.destroyScore[destroyOpNr] += Parameters.w1
                 self.repairScore[repairOpNr] += Parameters.w1  # the new solution is a new global best, 1.5
@@ -253,11 +360,13 @@ class ALNS:
                 self.repairScore[repairOpNr] += Parameters.w2  # the new solution is better than the current one 1.2
         else:
             if self.randomGen.random() < np.exp(
-                    - (self.tempSolution.distance - self.currentSolution.distance) / self.T):
-                self.currentSolution = self.tempSolution.copy()
+                    - (self.candidateDistance - currentDistance) / self.T):
+                self.acceptTempSolution()
                 self.destroyScore[destroyOpNr] += Parameters.w3  # the new solution is accepted 0.8
                 self.repairScore[repairOpNr] += Parameters.w3
             else:
+                if self.useUndoLog:
+                    self.tempSolution.rollback()
                 self.destroyScore[destroyOpNr] += Parameters.w4  # the new solution is rejected 0.6
                 self.repairScore[repairOpNr] += Parameters.w4
 
@@ -266,6 +375,98 @@ class ALNS:
         # Update temperature
         self.T = self.coolingRate * self.T  
 
+    def checkIfAcceptBatch(self):
+        """
+        Method that draws batchSize candidates of the current solution, evaluates them in
+        parallel and applies the acceptance criterion to them in order of their distance.
+        At most one candidate is accepted. The operators of every candidate are scored and
+        the temperature decreases once per candidate, as if the candidates were evaluated
+        one after the other.
+        """
+        if self.batchEvaluator is None:
+            self.batchEvaluator = BatchEvaluator(self.problem, (
+                self.nDestroyOps, self.nRepairOps, 0, self.minSizeNBH, self.maxPercentageNHB, self.tau,
+                self.coolingRate, self.decayParameter, self.noise), dict(
+                destroyOperators = self.destroyOperators, repairOperators = self.repairOperators), self.nWorkers)
+        currentDistance = self.currentSolution.distance
+        # the operators and the seeds of the candidates are drawn here, so that the
+        # result does not depend on the number of workers
+        candidates = []
+        for _ in range(self.batchSize):
+            sizeNBH = self.randomGen.randint(self.minSizeNBH, self.maxSizeNBH)
+            destroyOpNr = self.determineDestroyOpNr()
+            repairOpNr = self.determineRepairOpNr()
+            candidates.append((destroyOpNr, repairOpNr, sizeNBH, self.randomGen.getrandbits(64)))
+        results = self.batchEvaluator.evaluate(self.currentSolution, candidates, self.max_arc_length)
+
+        accepted = False
+        # ties are broken by the order in which the candidates were drawn
+        order = sorted(range(self.batchSize), key = lambda c: (results[c][1], c))
+        # the event of the iteration shows the accepted candidate, or else the best one
+        self.destroyOpNr, self.repairOpNr, self.sizeNBH, _ = candidates[order[0]]
+        for c in order:
+            destroyOpNr, repairOpNr, _, _ = candidates[c]
+            routeNodes, candidateDistance, (destroyTime, nRemoved, repairTime, nInserted) = results[c]
+            self.destroyOps[destroyOpNr].record(destroyTime, nRemoved)
+            self.repairOps[repairOpNr].record(repairTime, nInserted)
+            if accepted:
+                # another candidate was accepted, score as if this one was evaluated alone
+                score = Parameters.w2 if candidateDistance < currentDistance else Parameters.w4
+            elif candidateDistance < currentDistance:
+                accepted = True
+                self.destroyOpNr, self.repairOpNr, self.sizeNBH, _ = candidates[c]
+                self.candidateDistance = candidateDistance
+                self.currentSolution = buildSolution(self.problem, routeNodes)
+                # we found a global best solution
+                if candidateDistance < self.bestDistance:
+                    self.bestDistance = candidateDistance
+                    self.bestSolution = self.currentSolution.copy()
+                    score = Parameters.w1  # the new solution is a new global best, 1.5
+                    if self.bestSolution.distance < self.real_dist:
+                        self.real_dist = self.bestSolution.distance
+                        self.time_best_objective_found = time.time()
+                        self.optimal_iteration_number = self.iteration_number
+                else:
+                    score = Parameters.w2  # the new solution is better than the current one 1.2
+            elif self.randomGen.random() < np.exp(- (candidateDistance - currentDistance) / self.T):
+                accepted = True
+                self.destroyOpNr, self.repairOpNr, self.sizeNBH, _ = candidates[c]
+                self.candidateDistance = candidateDistance
+                self.currentSolution = buildSolution(self.problem, routeNodes)
+                score = Parameters.w3  # the new solution is accepted 0.8
+            else:
+                score = Parameters.w4  # the new solution is rejected 0.6
+            self.destroyScore[destroyOpNr] += score
+            self.repairScore[repairOpNr] += score
+
+            # Update the ALNS weights
+            self.updateWeights(destroyOpNr, repairOpNr)
+            # Update temperature
+            self.T = self.coolingRate * self.T
+        if not accepted:
+            self.candidateDistance = min(result[1] for result in results)
+        self.accepted = accepted
+
+    def closeBatchEvaluator(self):
+        """
+        Method that stops the worker processes of the batch evaluation, if they were started
+        """
+        if self.batchEvaluator is not None:
+            self.batchEvaluator.shutdown()
+            self.batchEvaluator = None
+
+    def acceptTempSolution(self):
+        """
+        Method that makes the candidate solution the current solution
+        """
+        self.accepted = True
+        if self.useUndoLog:
+            # the candidate already is the current solution, keep the changes
+            self.currentSolution.commitJournal()
+            self.currentSolution.computeDistance()
+        else:
+            self.currentSolution = self.tempSolution.copy()
+
     def updateWeights(self, destroyOpNr, repairOpNr):
         """
         Method that updates the weights of the destroy and repair operators
@@ -273,15 +474,28 @@ class ALNS:
         self.destroyUseTimes[destroyOpNr] += 1
         self.repairUseTimes[repairOpNr] += 1
 
-        self.wDestroy[destroyOpNr] = self.wDestroy[destroyOpNr] * (1 - self.decayParameter) + self.decayParameter * (
-                self.destroyScore[destroyOpNr] / self.destroyUseTimes[destroyOpNr])
-        
-        self.wDestroyPlot = self.wDestroy.copy()
+        destroyReward = self.destroyScore[destroyOpNr] / self.destroyUseTimes[destroyOpNr]
+        repairReward = self.repairScore[repairOpNr] / self.repairUseTimes[repairOpNr]
+        if self.timeAwareWeights:
+            destroyReward /= self.relativeTime(self.destroyOps, destroyOpNr)
+            repairReward /= self.relativeTime(self.repairOps, repairOpNr)
+
+        self.wDestroy[destroyOpNr] = self.wDestroy[destroyOpNr] * (1 - self.decayParameter) + self.decayParameter * destroyReward
+
+        self.wRepair[repairOpNr] = self.wRepair[repairOpNr] * (1 - self.decayParameter) + self.decayParameter * repairReward
 
-        self.wRepair[repairOpNr] = self.wRepair[repairOpNr] * (1 - self.decayParameter) + self.decayParameter * (
-                self.repairScore[repairOpNr] / self.repairUseTimes[repairOpNr])
-        self.wRepairPlot = self.wDestroy.copy()
 
+    def relativeTime(self, operators, opNr):
+        """
+        Method that returns the mean time of an operator divided by the mean time of all
+        calls of the operators, 1 as long as the operator has not been timed
+        """
+        calls = sum(operator.calls for operator in operators)
+        totalTime = sum(operator.totalTime for operator in operators)
+        operator = operators[opNr]
+        if operator.calls == 0 or operator.totalTime <= 0:
+            return 1
+        return operator.meanTime() / (totalTime / calls)
 
     def determineDestroyOpNr(self):
         """
@@ -315,72 +529,39 @@ class ALNS:
 
     def destroyAndRepair(self, destroyHeuristicNr, repairHeuristicNr, sizeNBH):
         """
-        Method that performs the destroy and repair. More destroy and/or
-        repair methods can be added
+        Method that performs the destroy and repair with the enabled operators of the
+        registries. More destroy and/or repair methods can be added by registering them.
+        Returns the wall-clock times of the operators and the number of removed and
+        inserted requests.
 
         Parameters
         ----------
         destroyHeuristicNr : int
-            number of the destroy operator.
+            number of the destroy operator, its position in the enabled destroy operators.
         repairHeuristicNr : int
-            number of the repair operator.
+            number of the repair operator, its position in the enabled repair operators.
         sizeNBH : int
             size of the neighborhood.
 
         """
-        # print('sizeNBH=', sizeNBH)
+        values = {'nRemove': sizeNBH, 'randomGen': self.randomGen, 'regretK': Parameters.regretK}
+
         # Perform the destroy
-        destroySolution = Destroy(self.problem, self.tempSolution)
-        if destroyHeuristicNr == 0:
-            destroySolution.executeRandomRemoval(sizeNBH, self.randomGen)
-            # print('after destroy')
-            # destroySolution.solution.print()
-        elif destroyHeuristicNr == 1:
-            destroySolution.executeWorstCostRemoval(sizeNBH)
-            # print('after destroy')
-            # destroySolution.solution.print()
-        elif destroyHeuristicNr == 2:
-            destroySolution.executeWorstTimeRemoval(sizeNBH)
-            # print('after destroy')
-            # destroySolution.solution.print()
-        elif destroyHeuristicNr == 3:
-            destroySolution.executeRandomRouteRemoval(sizeNBH, self.randomGen)
-            # print('after destroy')
-            # destroySolution.solution.print()
-        elif destroyHeuristicNr == 4:
-            destroySolution.executeShawRequestRemoval(sizeNBH, self.randomGen)
-            # print('after destroy')
-            # destroySolution.solution.print()
-        elif destroyHeuristicNr == 5:
-            destroySolution.executeProximityBasedRemoval(sizeNBH, self.randomGen)
-            # print('after destroy')
-            # destroySolution.solution.print()
-        elif destroyHeuristicNr == 6:
-            destroySolution.executeTimeBasedRemoval(sizeNBH, self.randomGen)
-            # print('after destroy')
-            # destroySolution.solution.print()
-        elif destroyHeuristicNr == 7:
-            destroySolution.executeDemandBasedRemoval(sizeNBH, self.randomGen)
-            # print('after destroy')
-            # destroySolution.solution.print()
-            
-        # Last destroy method gives error somehow...
-        # elif destroyHeuristicNr == 8:
-        #     destroySolution.executeWorstNeighborhoodRemoval(sizeNBH)
-        #     # print('after destroy')
-        #     # destroySolution.solution.print()
+        destroyOperator = self.destroyOps[destroyHeuristicNr]
+        nNotServed = len(self.tempSolution.notServed)
+        start = time.perf_counter()
+        destroyOperator.execute(Destroy(self.problem, self.tempSolution), values)
+        destroyTime = time.perf_counter() - start
+        nRemoved = len(self.tempSolution.notServed) - nNotServed
+        destroyOperator.record(destroyTime, nRemoved)
 
         # Perform the repair
-        repairSolution = Repair(self.problem, self.tempSolution)
-        if repairHeuristicNr == 0:
-            repairSolution.executeRandomInsertion(self.randomGen)
-            # print('after repair')
-            # self.tempSolution.print()
-        elif repairHeuristicNr == 1:
-            repairSolution.executeGreedyInsertion()
-            # print('after repair')
-            # self.tempSolution.print()
-        elif repairHeuristicNr == 2:
-            repairSolution.executeRegretInsertion()
-            # print('after repair')
-            # self.tempSolution.print()
+        repairOperator = self.repairOps[repairHeuristicNr]
+        nNotServed = len(self.tempSolution.notServed)
+        start = time.perf_counter()
+        repairOperator.execute(Repair(self.problem, self.tempSolution), values)
+        repairTime = time.perf_counter() - start
+        nInserted = nNotServed - len(self.tempSolution.notServed)
+        repairOperator.record(repairTime, nInserted)
+
+        return destroyTime, nRemoved, repairTime, nInserted
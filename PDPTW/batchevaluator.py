@@ -0,0 +1,74 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from solution import buildSolution
+
+# replica of the ALNS of a worker process, set once by initWorker
+workerALNS = None
+
+
+def initWorker(problem, alnsArguments, alnsKeywords):
+    """
+    Function that creates the replica of the ALNS in a worker process, so that the
+    problem instance is sent to every worker once
+    """
+    global workerALNS
+    from alns import ALNS  # alns imports this module
+    workerALNS = ALNS(problem, *alnsArguments, **alnsKeywords)
+
+
+def evaluateCandidate(routeNodes, destroyOpNr, repairOpNr, sizeNBH, seed, maxArcLength):
+    """
+    Function that applies a destroy and a repair operator to a solution in a worker
+    process. Returns the node lists of the routes of the candidate, its distance with
+    noise and the measurements of the operators (see ALNS.destroyAndRepair).
+    """
+    alns = workerALNS
+    alns.randomGen = random.Random(seed)
+    alns.tempSolution = buildSolution(alns.problem, routeNodes)
+    measurements = alns.destroyAndRepair(destroyOpNr, repairOpNr, sizeNBH)
+    distance = alns.tempSolution.computeDistanceWithNoise(maxArcLength, alns.noise, alns.randomGen)
+    return [route.nodes.tolist() for route in alns.tempSolution.routes], distance, measurements
+
+
+class BatchEvaluator:
+    """
+    Class that evaluates several destroy and repair candidates of the same solution
+    in parallel on a pool of worker processes. Every candidate has its own seed, so
+    the candidates do not depend on the number of workers or on the order in which
+    they finish.
+
+    Parameters
+    ----------
+    problem : PDPTW
+        The problem instance that we want to solve.
+    alnsArguments : tuple
+        positional arguments of ALNS after the problem, to create the replicas in the workers
+    alnsKeywords : Dict
+        keyword arguments of ALNS, to create the replicas in the workers
+    nWorkers : int
+        number of worker processes, the number of CPUs if None
+    executor : ProcessPoolExecutor
+        the pool of worker processes
+    """
+
+    def __init__(self, problem, alnsArguments, alnsKeywords, nWorkers = None):
+        self.problem = problem
+        self.executor = ProcessPoolExecutor(max_workers = nWorkers, initializer = initWorker,
+                                            initargs = (problem, alnsArguments, alnsKeywords))
+
+    def evaluate(self, solution, candidates, maxArcLength):
+        """
+        Method that evaluates the candidates (destroyOpNr, repairOpNr, sizeNBH, seed) of
+        a solution. Returns per candidate, in the same order, the result of evaluateCandidate.
+        """
+        routeNodes = [route.nodes.tolist() for route in solution.routes]
+        futures = [self.executor.submit(evaluateCandidate, routeNodes, destroyOpNr, repairOpNr, sizeNBH, seed,
+                                        maxArcLength) for destroyOpNr, repairOpNr, sizeNBH, seed in candidates]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """
+        Method that stops the worker processes
+        """
+        self.executor.shutdown()
@@ -0,0 +1,40 @@
+import subprocess, sys
+
+from parameters import Parameters
+
+'''
+Tool that checks that the solver core imports without the reporting libraries and within
+Parameters.importTimeBudget: python check_import_time.py. Exits with 1 if the check fails.
+'''
+
+CORE_MODULES = ('pdptw', 'route', 'solution', 'destroy', 'repair', 'alns', 'multistart', 'island')
+REPORTING_MODULES = ('reporting', 'matplotlib', 'pandas', 'xlsxwriter')
+
+# the import is timed in a fresh interpreter, so modules loaded here do not count
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import {modules}
+print(time.perf_counter() - start)
+print(','.join(m for m in {reporting!r} if m in sys.modules))
+'''
+
+
+def measureImportTime():
+    """
+    Function that returns the time in seconds to import the core modules in a new
+    interpreter and the reporting modules that were loaded by the import
+    """
+    script = SCRIPT.format(modules = ', '.join(CORE_MODULES), reporting = REPORTING_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], capture_output = True, text = True, check = True).stdout
+    importTime, loaded = output.splitlines()
+    return float(importTime), [module for module in loaded.split(',') if module]
+
+
+if __name__ == '__main__':
+    importTime, loaded = measureImportTime()
+    print(f'Import of the core: {importTime:.3f} seconds (budget {Parameters.importTimeBudget} seconds)')
+    if loaded:
+        print('The core imports reporting modules: ' + ', '.join(loaded))
+    if loaded or importTime > Parameters.importTimeBudget:
+        sys.exit(1)
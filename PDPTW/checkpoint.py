@@ -0,0 +1,117 @@
+import os, time
+
+import numpy as np
+
+from route import Route
+from solution import Solution
+
+# version of the layout of the checkpoint files
+CHECKPOINT_VERSION = 2
+
+
+def solutionArrays(solution, prefix):
+    """
+    Function that returns the routes and the order of the served and unserved requests
+    of a solution as arrays: the nodes of all routes after each other, the length of
+    every route and the request IDs in the order of served and notServed
+    """
+    routes = solution.routes
+    return {prefix + 'Nodes': np.concatenate([route.nodes for route in routes]) if routes else np.zeros(0, dtype = np.int32),
+            prefix + 'RouteLengths': np.array([len(route.nodes) for route in routes], dtype = np.int32),
+            prefix + 'Served': np.array([request.ID for request in solution.served], dtype = np.int32),
+            prefix + 'NotServed': np.array([request.ID for request in solution.notServed], dtype = np.int32)}
+
+
+def arraysSolution(problem, data, prefix):
+    """
+    Function that recreates a solution from the arrays of solutionArrays, with the
+    served and unserved requests in the same order
+    """
+    routes = []
+    for nodes in np.split(data[prefix + 'Nodes'], np.cumsum(data[prefix + 'RouteLengths'])[:-1]):
+        requests = {problem.requestsByID[int(requestID)] for requestID in problem.requestID[nodes[1:-1]]}
+        routes.append(Route(nodes.tolist(), requests, problem))
+    served = [problem.requestsByID[int(requestID)] for requestID in data[prefix + 'Served']]
+    notServed = [problem.requestsByID[int(requestID)] for requestID in data[prefix + 'NotServed']]
+    return Solution(problem, routes, served, notServed)
+
+
+def saveCheckpoint(alns, fileName, iteration):
+    """
+    Function that writes the state of an ALNS before the given iteration to a .npz file.
+    The file is first written under a temporary name and then renamed, so an interrupted
+    write never replaces the previous checkpoint.
+    """
+    version, randomState, gaussNext = alns.randomGen.getstate()
+    arrays = {'version': np.array([CHECKPOINT_VERSION, version]),
+              'nRequests': np.array(len(alns.problem.requests)),
+              'iteration': np.array(iteration),
+              'elapsed': np.array(time.time() - alns.starttime),
+              'timeBestFound': np.array(alns.time_best_objective_found - alns.starttime_best_objective),
+              'optimalIteration': np.array(alns.optimal_iteration_number),
+              'T': np.array(alns.T),
+              'bestDistance': np.array(alns.bestDistance),
+              'realDistance': np.array(alns.real_dist),
+              'randomState': np.array(randomState, dtype = np.uint32),
+              'gaussNext': np.array(np.nan if gaussNext is None else gaussNext),
+              'wDestroy': np.array(alns.wDestroy),
+              'wRepair': np.array(alns.wRepair),
+              'destroyScore': np.array(alns.destroyScore),
+              'repairScore': np.array(alns.repairScore),
+              'destroyUseTimes': np.array(alns.destroyUseTimes),
+              'repairUseTimes': np.array(alns.repairUseTimes),
+              'destroyTimes': np.array([[op.calls, op.totalTime, op.changedRequests] for op in alns.destroyOps]),
+              'repairTimes': np.array([[op.calls, op.totalTime, op.changedRequests] for op in alns.repairOps])}
+    arrays.update(alns.history.arrays())
+    arrays.update(solutionArrays(alns.currentSolution, 'current'))
+    arrays.update(solutionArrays(alns.bestSolution, 'best'))
+
+    temporaryName = fileName + '.tmp'
+    with open(temporaryName, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temporaryName, fileName)
+
+
+def loadCheckpoint(alns, fileName):
+    """
+    Function that restores the state of an ALNS from a file of saveCheckpoint. The ALNS
+    must have the same problem and operators as the one that wrote the file. Returns
+    the iteration at which the search continues.
+    """
+    with np.load(fileName) as data:
+        data = dict(data)
+    if data['version'][0] != CHECKPOINT_VERSION:
+        raise ValueError("Checkpoint " + fileName + " has an unsupported version")
+    if (int(data['nRequests']) != len(alns.problem.requests) or len(data['wDestroy']) != alns.nDestroyOps
+            or len(data['wRepair']) != alns.nRepairOps):
+        raise ValueError("Checkpoint " + fileName + " belongs to another problem or other operators")
+
+    alns.currentSolution = arraysSolution(alns.problem, data, 'current')
+    alns.bestSolution = arraysSolution(alns.problem, data, 'best')
+    alns.bestDistance = data['bestDistance'].item()
+    alns.real_dist = data['realDistance'].item()
+    alns.T = data['T'].item()
+    gaussNext = data['gaussNext'].item()
+    alns.randomGen.setstate((int(data['version'][1]), tuple(int(x) for x in data['randomState']),
+                             None if np.isnan(gaussNext) else gaussNext))
+
+    alns.wDestroy = data['wDestroy'].tolist()
+    alns.wRepair = data['wRepair'].tolist()
+    alns.destroyScore = data['destroyScore'].tolist()
+    alns.repairScore = data['repairScore'].tolist()
+    alns.destroyUseTimes = data['destroyUseTimes'].tolist()
+    alns.repairUseTimes = data['repairUseTimes'].tolist()
+    for operators, times in ((alns.destroyOps, data['destroyTimes']), (alns.repairOps, data['repairTimes'])):
+        for operator, (calls, totalTime, changedRequests) in zip(operators, times):
+            operator.calls, operator.totalTime, operator.changedRequests = int(calls), totalTime, int(changedRequests)
+    alns.history = alns.createHistory()
+    alns.history.restore(data['objectiveValues'], data['destroyWeights'], data['repairWeights'])
+
+    # the clock continues from the time of the checkpoint
+    alns.starttime = time.time() - data['elapsed'].item()
+    alns.starttime_best_objective = alns.starttime
+    alns.time_best_objective_found = alns.starttime + data['timeBestFound'].item()
+    alns.optimal_iteration_number = int(data['optimalIteration'])
+    iteration = int(data['iteration'])
+    alns.nIterationsDone = iteration
+    return iteration
@@ -1,4 +1,6 @@
+import bisect, heapq
 import numpy as np
+from operatorregistry import OperatorRegistry
 # from timeLog import Log
 # from Log.log import Log
 
@@ -14,55 +16,123 @@ class Destroy:
         The current solution in the ALNS algorithm
     randomGen : Random
         random number generator
+    removalHeap : List
+        max-heap of (-gain, request ID, route version) for the worst removal methods
     '''
 
     def __init__(self, problem, solution):
         self.problem = problem
         self.solution = solution
 
+    @staticmethod
+    def createRegistry():
+        '''
+        Method that returns a registry with all destroy methods, in order of their numbers
+        '''
+        registry = OperatorRegistry()
+        registry.register('randomRequest', Destroy.executeRandomRemoval, ('nRemove', 'randomGen'))
+        registry.register('worstDistance', Destroy.executeWorstCostRemoval, ('nRemove',))
+        registry.register('worstTime', Destroy.executeWorstTimeRemoval, ('nRemove',))
+        registry.register('randomRoute', Destroy.executeRandomRouteRemoval, ('nRemove', 'randomGen'))
+        registry.register('shaw', Destroy.executeShawRequestRemoval, ('nRemove', 'randomGen'))
+        registry.register('proximityBased', Destroy.executeProximityBasedRemoval, ('nRemove', 'randomGen'))
+        registry.register('timeBased', Destroy.executeTimeBasedRemoval, ('nRemove', 'randomGen'))
+        registry.register('demandBased', Destroy.executeDemandBasedRemoval, ('nRemove', 'randomGen'))
+        registry.register('worstNeighborhood', Destroy.executeWorstNeighborhoodRemoval, ('nRemove',))
+        return registry
+
+    def servedNodes(self):
+        '''
+        Method that returns the nodeIDs of all pickups and deliveries in the routes
+        '''
+        return np.concatenate([route.nodes[1:-1] for route in self.solution.routes])
+
+    def computeDetours(self, route):
+        '''
+        Method that returns, for every node between the depots of a route, the distance
+        from its predecessor plus the distance to its successor
+        '''
+        distMatrix = self.problem.distMatrix
+        nodes = route.nodes
+        return distMatrix[nodes[:-2], nodes[1:-1]] + distMatrix[nodes[1:-1], nodes[2:]]
+
+    def requestPositions(self, route):
+        '''
+        Method that returns the request IDs of the requests in a route and the positions
+        of their pickups and deliveries
+        '''
+        requestIDs = self.problem.requestID[route.nodes[1:-1]]
+        # a stable sort keeps the pickup before the delivery of every request
+        positions = (np.argsort(requestIDs, kind = 'stable') + 1).reshape(-1, 2)
+        return requestIDs[positions[:, 0] - 1], positions[:, 0], positions[:, 1]
+
+    def computeRemovalGains(self, route):
+        '''
+        Method that returns the request IDs of a route and the decrease in distance
+        when both the pickup and the delivery of the request are removed
+        '''
+        distMatrix = self.problem.distMatrix
+        nodes = route.nodes
+        requestIDs, pickUpIndices, deliveryIndices = self.requestPositions(route)
+        # removing a node saves the arcs from its predecessor and to its successor, but adds the arc between them
+        detours = self.computeDetours(route) - distMatrix[nodes[:-2], nodes[2:]]
+        gains = detours[pickUpIndices - 1] + detours[deliveryIndices - 1]
+        # if the delivery directly follows the pickup both are removed from between the same two nodes
+        adjacent = deliveryIndices == pickUpIndices + 1
+        before, pickUps = nodes[pickUpIndices - 1], nodes[pickUpIndices]
+        deliveries, after = nodes[deliveryIndices], nodes[deliveryIndices + 1]
+        gains = np.where(adjacent, distMatrix[before, pickUps] + distMatrix[pickUps, deliveries]
+                         + distMatrix[deliveries, after] - distMatrix[before, after], gains)
+        return requestIDs, gains
+
+    def computeTimeDeviations(self, route):
+        '''
+        Method that returns the request IDs of a route and the largest difference between
+        the service start time and the start of the time window of the pickup and delivery
+        '''
+        requestIDs, pickUpIndices, deliveryIndices = self.requestPositions(route)
+        deviations = np.array(route.servStartTimes) - self.problem.startTW[route.nodes]
+        return requestIDs, np.maximum(deviations[pickUpIndices], deviations[deliveryIndices])
+
+    def pushRemovalGains(self, route, computeGains):
+        '''
+        Method that adds the gains of the requests of a route to the removal heap
+        '''
+        requestIDs, gains = computeGains(route)
+        for requestID, gain in zip(requestIDs.tolist(), gains.tolist()):
+            heapq.heappush(self.removalHeap, (-gain, requestID, route.version))
+
+    def initRemovalHeap(self, computeGains):
+        '''
+        Method that computes the gains of all served requests once per destroy
+        '''
+        self.removalHeap = []
+        for route in self.solution.routes:
+            requestIDs, gains = computeGains(route)
+            self.removalHeap.extend(zip((-gains).tolist(), requestIDs.tolist(), [route.version] * len(gains)))
+        heapq.heapify(self.removalHeap)
+
+    def popWorstRequest(self):
+        '''
+        Method that returns the served request with the largest gain, skipping entries
+        of routes that changed since the gain was computed
+        '''
+        while self.removalHeap:
+            _, requestID, version = heapq.heappop(self.removalHeap)
+            request, route = self.solution.requestIndex[requestID]
+            if route is not None and route.version == version:
+                return request
+        return None
+
     '''Helper function method 2'''
     def findWorstCostRequest(self):
-        cost = []
-        # Making list with request ID's and their corresponding cost
-        for route in self.solution.routes:
-            for i in range(2, len(route.locations)):
-                first_node_ID = route.locations[i - 2].nodeID
-                middle_note_ID = route.locations[i - 1].nodeID
-                last_node_ID = route.locations[i].nodeID
-                request_ID = route.locations[i - 1].requestID
-                dist = self.problem.distMatrix[first_node_ID][middle_note_ID]+self.problem.distMatrix[middle_note_ID][last_node_ID]
-                cost.append([request_ID, dist])
-        # Sort cost
-        cost = sorted(cost, key = lambda d: d[1], reverse = True)
-        chosen_request = None
-        # Get request object that corresponds to worst cost 
-        worst_cost_request_ID = cost[0][0]
-        for req in self.solution.served:
-            if req.ID == worst_cost_request_ID:
-                chosen_request = req
-                break
-        return chosen_request
+        # Get request object that corresponds to worst cost, the lowest request ID in case of ties
+        return self.popWorstRequest()
 
     '''Helper function method 3'''
     def findWorstTimeRequest(self):
-        service_time_difference = []
-        # Making list with request ID's and difference between serivce start time and the start of time window
-        for route in self.solution.routes:
-            route.calculateServiceStartTime()
-            for location in route.locations:
-                if location.typeLoc != 0:
-                    difference = location.servStartTime - location.startTW
-                    service_time_difference.append([location.requestID, difference])
-        # Sort list with time differences
-        service_time_difference = sorted(service_time_difference, key = lambda d: d[1], reverse = True)
-        # Get request object that corresponds to worst cost
-        worst_time_request_ID = service_time_difference[0][0]
-        chosen_request = None
-        for req in self.solution.served:
-            if req.ID == worst_time_request_ID:
-                chosen_request = req
-                break
-        return chosen_request
+        # Get request object that corresponds to worst difference between service start time and start of time window
+        return self.popWorstRequest()
 
     '''Helper function method 4'''
     def findRandomRoute(self, randomGen):
@@ -74,31 +144,19 @@ class Destroy:
                 return None
             route = randomGen.choice(set_of_routes)
             # If no request can be removed from this route
-            if len(route.locations) < 4:
+            if len(route.nodes) < 4:
                 set_of_routes.remove(route)
             else:
                 return route
 
     def findWorstCostRequestRandomRoute(self, randomGen):
         route = self.findRandomRoute(randomGen)
-        cost = []
-        # Making list with request ID's and their corresponding cost
-        for i in range(2, len(route.locations)):
-            first_node_ID = route.locations[i - 2].nodeID
-            middle_note_ID = route.locations[i - 1].nodeID
-            last_node_ID = route.locations[i].nodeID
-            request_ID = route.locations[i - 1].requestID
-            dist = self.problem.distMatrix[first_node_ID][middle_note_ID]+self.problem.distMatrix[middle_note_ID][last_node_ID]
-            cost.append([request_ID, dist])
-        # Sort cost
-        cost = sorted(cost, key = lambda d: d[1], reverse = True)
+        # Making arrays with request ID's and their corresponding cost
+        cost = self.computeDetours(route)
+        request_IDs = self.problem.requestID[route.nodes[1:-1]]
         # Get request object that corresponds to worst cost 
-        worst_cost_request_ID = cost[0][0]
-        chosen_request = None
-        for req in self.solution.served:
-            if req.ID == worst_cost_request_ID:
-                chosen_request = req
-                break
+        worst_cost_request_ID = request_IDs[np.argmax(cost)]
+        chosen_request = self.solution.getRequest(int(worst_cost_request_ID))
         return chosen_request
 
     '''Helper functions method 5'''
@@ -110,172 +168,94 @@ class Destroy:
         while potentialRoutes:
             route = randomGen.choice(potentialRoutes)
             # Might exist the situation of [depot, depot]
-            if len(route.locations) > 2:
+            if len(route.nodes) > 2:
                 # From this route, choose a random location which is not the depot
-                location = randomGen.choice(
-                    [location for location in route.locations if location.typeLoc != 0])
+                location = randomGen.choice(route.nodes[1:-1].tolist())
                 break
             else:
-                potentialRoutes.remove(route)
+                # drop the empty route from the solution
+                self.solution.removeRoute(route)
         return location
 
     def findNextShawRequest(self):
-        # Initialize key variables and location that is currently selected
-        locations, distances, start_tws, demands = [], [], [], []
+        # Location that is currently selected, and all other locations which are not depots
         loc_i = self.last_shaw_location
-        # Define values of key variables for location i
-        location_i, start_tw_i, demand_i = loc_i.nodeID, loc_i.startTW, loc_i.demand
-        # Find values of key variables for all other locations
-        for route in self.solution.routes:
-            for loc_j in route.locations:
-                # Only consider locations which are not depots
-                if loc_j.typeLoc != 0:
-                    locations.append(loc_j)
-                    location_j, start_tw_j, demand_j = loc_j.nodeID, loc_j.startTW, loc_j.demand
-                    # Find difference of the two nodes in terms of the key variables
-                    distance_diff = self.problem.distMatrix[location_i][location_j]
-                    start_tw_diff = abs(start_tw_i-start_tw_j)
-                    demand_diff = abs(demand_i-demand_j)
-                    # Add differences to the lists of key variables
-                    distances.append(distance_diff)
-                    start_tws.append(start_tw_diff)
-                    demands.append(demand_diff)
-        # Normalize values
-        if sum(start_tws):
-            normalized_start_tws = list(map(lambda x: x / sum(start_tws), start_tws))
-        else:
-            normalized_start_tws = start_tws
-        if sum(distances):
-            normalized_distances = list(map(lambda x: x / sum(distances), distances))
-        else:
-            normalized_distances = distances
-        if sum(demands):
-            normalized_demands = list(map(lambda x: x / sum(demands), demands))
-        else:
-            normalized_demands = demands
-        # normalized_distances = list(map(lambda x:x/sum(distances), distances))
-        # normalized_start_tws = list(map(lambda x:x/sum(start_tws), start_tws))
-        # normalized_demands = list(map(lambda x:x/sum(demands), demands))
-
-        # Calculate relatednesses to each location based on the normalized values
-        relatednesses = []
-        for index, location in enumerate(locations):
-            relatednesses.append((location,
-                                  normalized_distances[index] +
-                                  normalized_start_tws[index] +
-                                  normalized_demands[index]))
-        # Sort locations based on relatednesses and choose most related one
-        relatednesses = sorted(relatednesses, key = lambda r: r[1], reverse = False)
-        self.last_shaw_location = relatednesses[0][0]
+        locations = self.servedNodes()
+        # Choose the most related location with the precomputed relatednesses
+        relatednesses = self.problem.shawRelatedness[loc_i, locations]
+        self.last_shaw_location = locations[np.argmin(relatednesses)]
         # Determine request that is related to the most related location
-        chosen_request = None
-        for req in self.solution.served:
-            if req.ID == self.last_shaw_location.requestID:
-                chosen_request = req
-                break
+        request_ID = self.problem.requestID[self.last_shaw_location]
+        chosen_request = self.solution.getRequest(int(request_ID))
         return chosen_request
 
+    def findClosestServedNode(self, sortedValues, order, value):
+        '''
+        Method that returns the served node with the value closest to the given value,
+        searching outwards from the position of the value in the sorted values
+        '''
+        servedMask = self.solution.servedMask
+        right = bisect.bisect_left(sortedValues, value)
+        left = right - 1
+        while left >= 0 and not servedMask[order[left]]:
+            left -= 1
+        while right < len(order) and not servedMask[order[right]]:
+            right += 1
+        if right == len(order) or (left >= 0 and value - sortedValues[left] < sortedValues[right] - value):
+            return order[left]
+        return order[right]
+
     '''Helper function method 6'''
     def findNextProximityBasedRequest(self):
-        # Initialize location that is currently selected
-        loc_i = self.last_proximity_location
-        closest = np.inf
-        # Find closest location in terms of distance
-        for route in self.solution.routes:
-            for loc_j in route.locations:
-                # Only consider locations which are not depots
-                if loc_j.typeLoc != 0:
-                    distance_diff = self.problem.distMatrix[loc_i.nodeID][loc_j.nodeID]
-                    if distance_diff < closest:
-                        chosen_location = loc_j
-                        closest = distance_diff
-
-        self.last_proximity_location = chosen_location
-        chosen_request =None
+        # Find closest location in terms of distance to the location that is currently selected,
+        # first among its nearest locations and otherwise among all served locations
+        nearest = self.problem.nearestNodes[self.last_proximity_location]
+        served = self.solution.servedMask[nearest]
+        if served.any():
+            self.last_proximity_location = nearest[np.argmax(served)]
+        else:
+            locations = self.servedNodes()
+            distances = self.problem.distMatrix[self.last_proximity_location, locations]
+            self.last_proximity_location = locations[np.argmin(distances)]
         # Determine request that is related to the closest location
-        for req in self.solution.served:
-            if req.ID == self.last_proximity_location.requestID:
-                chosen_request = req
-                break
+        request_ID = self.problem.requestID[self.last_proximity_location]
+        chosen_request = self.solution.getRequest(int(request_ID))
         return chosen_request
 
 
     '''Helper function method 7'''
     def findNextTimeBasedRequest(self):
-        # Initialize location that is currently selected
-        loc_i = self.last_time_based_location
-        smallest_diff = np.inf
-
-        # Find most related location in terms of start time window
-        for route in self.solution.routes:
-            for loc_j in route.locations:
-                # Only consider locations which are not depots
-                if loc_j.typeLoc != 0:
-                    tw_diff = abs(loc_i.startTW - loc_j.startTW)
-                    if tw_diff < smallest_diff:
-                        chosen_location = loc_j
-                        smallest_diff = tw_diff
-        self.last_time_based_location = chosen_location
-        chosen_request = None
+        # Find most related location in terms of start time window to the location that is currently selected
+        self.last_time_based_location = self.findClosestServedNode(
+            self.problem.sortedStartTW, self.problem.startTWOrder, self.problem.startTW[self.last_time_based_location])
         # Determine request that is related to the closest location
-        for req in self.solution.served:
-            if req.ID == self.last_time_based_location.requestID:
-                chosen_request = req
-                break
+        request_ID = self.problem.requestID[self.last_time_based_location]
+        chosen_request = self.solution.getRequest(int(request_ID))
         return chosen_request
 
     '''Helper function method 8'''
     def findNextDemandBasedRequest(self):
-        # Initialize location that is currently selected
-        loc_i = self.last_demand_based_location
-        smallest_diff = np.inf
-
-        # Find most related location in terms of demand
-        for route in self.solution.routes:
-            for loc_j in route.locations:
-                # Only consider locations which are not depots
-                if loc_j.typeLoc != 0:
-                    demand_diff = abs(loc_i.demand - loc_j.demand)
-                    if demand_diff < smallest_diff:
-                        chosen_location = loc_j
-                        smallest_diff = demand_diff
-        self.last_demand_based_location = chosen_location
-        chosen_request = None
+        # Find most related location in terms of demand to the location that is currently selected
+        self.last_demand_based_location = self.findClosestServedNode(
+            self.problem.sortedDemand, self.problem.demandOrder, self.problem.demand[self.last_demand_based_location])
         # Determine request that is related to the closest location
-        for req in self.solution.served:
-            if req.ID == self.last_demand_based_location.requestID:
-                chosen_request = req
-                break
+        request_ID = self.problem.requestID[self.last_demand_based_location]
+        chosen_request = self.solution.getRequest(int(request_ID))
         return chosen_request
 
     '''Helper function method 9'''
     def findWorstNeighborhoodRequest(self):
         cost = []
-        # Making list with request ID's and their corresponding cost
+        # Making arrays with request ID's and their cost relative to the cost of their route
         for route in self.solution.routes:
-            requests, ditstances = [], []
-            total_dist = 0
-            for i in range(2, len(route.locations)):
-                first_node_ID = route.locations[i - 2].nodeID
-                middle_note_ID = route.locations[i - 1].nodeID
-                last_node_ID = route.locations[i].nodeID
-                request_ID = route.locations[i - 1].requestID
-                dist = self.problem.distMatrix[first_node_ID][middle_note_ID]+self.problem.distMatrix[middle_note_ID][last_node_ID]
-                requests.append(request_ID)
-                ditstances.append(dist)
-                total_dist += dist
-            for index, request in enumerate(requests):
-                cost.append([request, ditstances[index]/total_dist])
-        # Sort cost
-        cost = sorted(cost, key = lambda d: d[1], reverse = True)
-        # print(cost)
+            detours = self.computeDetours(route)
+            # a route with all its locations at the depot has no detours
+            cost.append(detours / max(detours.sum(), 1))
+        cost = np.concatenate(cost)
+        request_IDs = self.problem.requestID[self.servedNodes()]
         # Get request object that corresponds to worst cost 
-        worst_average_cost_request_ID = cost[0][0]
-        chosen_request = None
-        for req in self.solution.served:
-            if req.ID == worst_average_cost_request_ID:
-                chosen_request = req
-                break
+        worst_average_cost_request_ID = request_IDs[np.argmax(cost)]
+        chosen_request = self.solution.getRequest(int(worst_average_cost_request_ID))
         return chosen_request
 
 
@@ -298,6 +278,7 @@ class Destroy:
 
     # @Log('time_output.csv')
     def executeWorstCostRemoval(self, nRemove):
+        self.initRemovalHeap(self.computeRemovalGains)
         for i in range(nRemove):
             if len(self.solution.served) == 0:
                 break
@@ -306,12 +287,15 @@ class Destroy:
             # print(chosen_req)
             # print("\n")
             if chosen_req != None:
-                self.solution.removeRequest(chosen_req)
+                route = self.solution.removeRequest(chosen_req)
+                # only the gains of the requests in the changed route change
+                self.pushRemovalGains(route, self.computeRemovalGains)
 
     '''Destroy method number 3'''
 
     # @Log('time_output.csv')
     def executeWorstTimeRemoval(self, nRemove):
+        self.initRemovalHeap(self.computeTimeDeviations)
         for i in range(nRemove):
             if len(self.solution.served) == 0:
                 break
@@ -321,7 +305,9 @@ class Destroy:
             # print(chosen_req)
             # print("\n")
             if chosen_req != None:
-                self.solution.removeRequest(chosen_req)
+                route = self.solution.removeRequest(chosen_req)
+                # only the service start times in the changed route change
+                self.pushRemovalGains(route, self.computeTimeDeviations)
 
     '''Destroy method number 4'''
 
@@ -348,11 +334,8 @@ class Destroy:
         self.last_shaw_location = location
 
         # Select corresponding request
-        request_ID = location.requestID
-        for req in self.solution.served:
-            if req.ID == request_ID:
-                self.solution.removeRequest(req)
-                break
+        request_ID = self.problem.requestID[location]
+        self.solution.removeRequest(self.solution.getRequest(int(request_ID)))
 
         # Remove next requests based on relatednesses between locations
         for _ in range(nRemove-1):
@@ -376,11 +359,8 @@ class Destroy:
         self.last_proximity_location = location
 
         # Select corresponding request
-        request_ID = location.requestID
-        for req in self.solution.served:
-            if req.ID == request_ID:
-                self.solution.removeRequest(req)
-                break
+        request_ID = self.problem.requestID[location]
+        self.solution.removeRequest(self.solution.getRequest(int(request_ID)))
 
         # Remove next requests based on relatedness in terms of distance between locations
         for _ in range(nRemove-1):
@@ -404,11 +384,8 @@ class Destroy:
         self.last_time_based_location = location
 
         # Select corresponding request
-        request_ID = location.requestID
-        for req in self.solution.served:
-            if req.ID == request_ID:
-                self.solution.removeRequest(req)
-                break
+        request_ID = self.problem.requestID[location]
+        self.solution.removeRequest(self.solution.getRequest(int(request_ID)))
 
         # Remove next requests based on relatedness in terms of start time windows between locations
         for _ in range(nRemove-1):
@@ -432,11 +409,8 @@ class Destroy:
         self.last_demand_based_location = location
 
         # Select corresponding request
-        request_ID = location.requestID
-        for req in self.solution.served:
-            if req.ID == request_ID:
-                self.solution.removeRequest(req)
-                break
+        request_ID = self.problem.requestID[location]
+        self.solution.removeRequest(self.solution.getRequest(int(request_ID)))
 
         # Remove next requests based on relatedness in terms of start time windows between locations
         for _ in range(nRemove-1):
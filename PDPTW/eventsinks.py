@@ -0,0 +1,123 @@
+import sys
+
+import numpy as np
+
+
+class NullSink:
+    """
+    Class that represents a sink that ignores the iteration events of the ALNS. The ALNS
+    does not even collect the events when the sink is not active.
+
+    Parameters
+    ----------
+    active : boolean
+        if False, the ALNS does not call iteration
+    """
+
+    active = False
+
+    def iteration(self, iteration, destroyOpNr, repairOpNr, sizeNBH, candidate, current, best, accepted,
+                  temperature, elapsed):
+        """
+        Method that receives the event of an iteration of the ALNS: the iteration number,
+        the operators, the size of the neighbourhood, the distance of the candidate (with
+        noise), of the current and of the best solution, whether the candidate was accepted,
+        the temperature and the elapsed wall-clock time in seconds
+        """
+        pass
+
+    def close(self):
+        """
+        Method that is called at the end of ALNS.execute
+        """
+        pass
+
+
+class ConsoleSink(NullSink):
+    """
+    Class that represents a sink that prints the progress of the ALNS every
+    interval iterations
+
+    Parameters
+    ----------
+    interval : int
+        number of iterations between two printed lines
+    stream : file
+        where the lines are written, sys.stdout if None
+    """
+
+    active = True
+
+    def __init__(self, interval = 100, stream = None):
+        self.interval = interval
+        self.stream = stream
+
+    def iteration(self, iteration, destroyOpNr, repairOpNr, sizeNBH, candidate, current, best, accepted,
+                  temperature, elapsed):
+        if iteration % self.interval == 0:
+            print(f'Iteration {iteration}: candidate {candidate:.1f}, current {current}, best {best}, '
+                  f'T {temperature:.3f}, {elapsed:.2f} seconds', file = self.stream or sys.stdout)
+
+
+class TraceWriter(NullSink):
+    """
+    Class that represents a sink that writes every iteration event to a file. The events
+    are collected in a preallocated buffer and written when the buffer is full and at
+    the end of the run, either as CSV or as raw binary records of TraceWriter.DTYPE that
+    can be read with TraceWriter.read.
+
+    Parameters
+    ----------
+    fileName : string
+        file to write, it is overwritten
+    binary : boolean
+        if True, the records are written in binary, else as CSV with a header
+    bufferSize : int
+        number of events in the buffer
+    """
+
+    active = True
+    DTYPE = np.dtype([('iteration', np.int64), ('destroyOp', np.int16), ('repairOp', np.int16),
+                      ('sizeNBH', np.int32), ('candidate', np.float64), ('current', np.float64),
+                      ('best', np.float64), ('accepted', np.bool_), ('temperature', np.float64),
+                      ('elapsed', np.float64)])
+
+    def __init__(self, fileName, binary = False, bufferSize = 4096):
+        self.fileName = fileName
+        self.binary = binary
+        self.buffer = np.zeros(bufferSize, dtype = self.DTYPE)
+        self.nBuffered = 0
+        self.file = open(fileName, 'wb' if binary else 'w')
+        if not binary:
+            self.file.write(','.join(self.DTYPE.names) + '\n')
+
+    def iteration(self, iteration, destroyOpNr, repairOpNr, sizeNBH, candidate, current, best, accepted,
+                  temperature, elapsed):
+        self.buffer[self.nBuffered] = (iteration, destroyOpNr, repairOpNr, sizeNBH, candidate, current, best,
+                                       accepted, temperature, elapsed)
+        self.nBuffered += 1
+        if self.nBuffered == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        """
+        Method that writes the buffered events to the file
+        """
+        records = self.buffer[:self.nBuffered]
+        if self.binary:
+            records.tofile(self.file)
+        else:
+            np.savetxt(self.file, records, fmt = ['%d', '%d', '%d', '%d', '%.6g', '%.6g', '%.6g', '%d', '%.6g', '%.6f'],
+                       delimiter = ',')
+        self.nBuffered = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    @staticmethod
+    def read(fileName):
+        """
+        Method that reads a binary trace as a structured array
+        """
+        return np.fromfile(fileName, dtype = TraceWriter.DTYPE)
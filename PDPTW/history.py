@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class History:
+    """
+    Class that records the objective value and the operator weights of every iteration
+    of the ALNS in preallocated arrays. When the number of iterations is not known in
+    advance, the arrays grow in chunks.
+
+    Parameters
+    ----------
+    objectiveValues : 1D array
+        distance of the candidate solution per iteration
+    destroyWeights : 2D array
+        weights of the destroy operators per iteration
+    repairWeights : 2D array
+        weights of the repair operators per iteration
+    size : int
+        number of recorded iterations
+    chunkSize : int
+        number of rows added when the arrays are full
+    """
+
+    def __init__(self, nDestroyOps, nRepairOps, capacity, chunkSize):
+        self.objectiveValues = np.zeros(capacity)
+        self.destroyWeights = np.zeros((capacity, nDestroyOps))
+        self.repairWeights = np.zeros((capacity, nRepairOps))
+        self.size = 0
+        self.chunkSize = chunkSize
+
+    def record(self, objectiveValue, wDestroy, wRepair):
+        """
+        Method that records the values of the next iteration
+        """
+        if self.size == len(self.objectiveValues):
+            self.grow(self.chunkSize)
+        self.objectiveValues[self.size] = objectiveValue
+        self.destroyWeights[self.size] = wDestroy
+        self.repairWeights[self.size] = wRepair
+        self.size += 1
+
+    def grow(self, nRows):
+        self.objectiveValues = np.concatenate([self.objectiveValues, np.zeros(nRows)])
+        self.destroyWeights = np.concatenate([self.destroyWeights, np.zeros((nRows, self.destroyWeights.shape[1]))])
+        self.repairWeights = np.concatenate([self.repairWeights, np.zeros((nRows, self.repairWeights.shape[1]))])
+
+    def arrays(self):
+        """
+        Method that returns the recorded part of the arrays by name
+        """
+        return {'objectiveValues': self.objectiveValues[:self.size],
+                'destroyWeights': self.destroyWeights[:self.size],
+                'repairWeights': self.repairWeights[:self.size]}
+
+    def restore(self, objectiveValues, destroyWeights, repairWeights):
+        """
+        Method that replaces the recorded values, for example by those of a checkpoint
+        """
+        self.size = 0
+        if len(objectiveValues) > len(self.objectiveValues):
+            self.grow(len(objectiveValues) - len(self.objectiveValues))
+        self.size = len(objectiveValues)
+        self.objectiveValues[:self.size] = objectiveValues
+        self.destroyWeights[:self.size] = destroyWeights
+        self.repairWeights[:self.size] = repairWeights
+
+    def save(self, fileName, destroyNames, repairNames):
+        """
+        Method that writes the recorded values and the names of the operators to a .npz file,
+        plot_history.py plots them and write_objective_values.py writes them to Excel
+        """
+        np.savez(fileName, destroyNames = np.array(destroyNames), repairNames = np.array(repairNames),
+                 **self.arrays())
@@ -0,0 +1,80 @@
+class IndexedSet:
+    """
+    Class that models a set of items that also supports access by position, so that
+    adding, removing, membership and picking a random item all take constant time.
+    Removing an item moves the last item to its position, so the order of the items
+    only depends on the sequence of additions and removals, which keeps random
+    choices reproducible.
+
+    Parameters
+    ----------
+    items : List
+        the items in the set, in order of position
+    positions : Dict
+        position of every item in items
+    """
+
+    def __init__(self, items = ()):
+        self.items = list()
+        self.positions = dict()
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def add(self, item):
+        """
+        Method that adds an item at the last position
+        """
+        self.positions[item] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        """
+        Method that removes an item, the last item takes its position. Returns the
+        position of the removed item.
+        """
+        index = self.positions.pop(item)
+        last = self.items.pop()
+        if last is not item:
+            self.items[index] = last
+            self.positions[last] = index
+        return index
+
+    def restore(self, item, index):
+        """
+        Method that undoes the removal of an item at the given position, the item
+        that took its position moves back to the last position
+        """
+        if index < len(self.items):
+            moved = self.items[index]
+            self.positions[moved] = len(self.items)
+            self.items.append(moved)
+            self.items[index] = item
+        else:
+            self.items.append(item)
+        self.positions[item] = index
+
+    def pop(self):
+        """
+        Method that removes and returns the item at the last position
+        """
+        item = self.items.pop()
+        del self.positions[item]
+        return item
+
+    def copy(self):
+        copy = IndexedSet()
+        copy.items = self.items.copy()
+        copy.positions = self.positions.copy()
+        return copy
@@ -0,0 +1,71 @@
+from route import Route
+
+class InsertionCache:
+    """
+    Class that caches the best and second best insertion of a request in a route.
+    An entry is valid as long as the route has the version it was computed for, so
+    after an insertion only the modified route is evaluated again. A route is evaluated
+    for all pending requests at once.
+
+    Parameters
+    ----------
+    problem : PDPTW
+        The problem instance that we want to solve.
+    requests : collection of Requests
+        the requests that are evaluated together when a route is evaluated, usually
+        the unserved requests of the solution
+    insertions : Dict
+        (request ID, route) -> (version of the route, best insertion, second best insertion)
+    newRouteCosts : Dict
+        request ID -> distance of a new route serving only that request
+    """
+
+    def __init__(self, problem, requests = ()):
+        self.problem = problem
+        self.requests = requests
+        self.insertions = dict()
+        self.newRouteCosts = dict()
+
+    def findTwoBestInsertions(self, request, route):
+        """
+        Method that returns the best and second best insertion of a request in a
+        route as (cost, preNode_index, afterNode_index), None if there are less
+        feasible insertions
+        """
+        entry = self.insertions.get((request.ID, route))
+        if entry is None or entry[0] != route.version:
+            self.evaluateRoute(route, request)
+            entry = self.insertions[(request.ID, route)]
+        return entry[1], entry[2]
+
+    def evaluateRoute(self, route, request):
+        """
+        Method that computes the insertions in a route of a request and of all pending
+        requests without a valid entry for the route
+        """
+        requests = [request]
+        for other in self.requests:
+            entry = self.insertions.get((other.ID, route))
+            if other is not request and (entry is None or entry[0] != route.version):
+                requests.append(other)
+        for other, insertions in zip(requests, route.findTwoBestInsertions(requests)):
+            self.insertions[(other.ID, route)] = (route.version,) + insertions
+
+    def findBestInsertion(self, request, route):
+        """
+        Method that returns the best insertion of a request in a route, None if
+        no insertion is feasible
+        """
+        return self.findTwoBestInsertions(request, route)[0]
+
+    def newRouteCost(self, request):
+        """
+        Method that returns the distance of a new route that only serves the request
+        """
+        cost = self.newRouteCosts.get(request.ID)
+        if cost is None:
+            nodeList = [self.problem.depot.nodeID, request.pickUpLoc.nodeID, request.deliveryLoc.nodeID,
+                        self.problem.depot.nodeID]
+            cost = Route(nodeList, {request}, self.problem).distance
+            self.newRouteCosts[request.ID] = cost
+        return cost
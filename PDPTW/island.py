@@ -0,0 +1,240 @@
+import contextlib, io, os, time, traceback
+import multiprocessing as mp
+
+from alns import ALNS
+from multistart import MultiStartALNS, runStatistics
+from solution import buildSolution
+from parameters import Parameters
+
+
+def acceptMigrant(alns, migrant, acceptancePolicy):
+    """
+    Function that offers a migrant solution to an island. The migrant becomes the best
+    solution of the island if it is better, and it replaces the current solution
+    according to the acceptance policy:
+    'always' always, 'improving' if it is better than the current solution,
+    'best' if it is better than the best solution of the island
+    """
+    improvesBest = migrant.distance < alns.bestSolution.distance
+    if acceptancePolicy == 'always':
+        replaceCurrent = True
+    elif acceptancePolicy == 'improving':
+        replaceCurrent = migrant.distance < alns.currentSolution.distance
+    elif acceptancePolicy == 'best':
+        replaceCurrent = improvesBest
+    else:
+        raise ValueError("Unknown acceptance policy " + str(acceptancePolicy))
+
+    if improvesBest:
+        alns.bestSolution = migrant.copy()
+        alns.bestDistance = migrant.distance
+        alns.real_dist = min(alns.real_dist, migrant.distance)
+        # the island improved, so the stagnation count and the time of the best solution start again
+        alns.time_best_objective_found = time.time()
+        alns.optimal_iteration_number = alns.nIterationsDone
+    if replaceCurrent:
+        alns.currentSolution = migrant
+
+
+def islandFileName(fileName, islandIndex):
+    """
+    Function that returns the name of the file of an island, the island index is added before the extension
+    """
+    root, extension = os.path.splitext(fileName)
+    return f'{root}_island{islandIndex}{extension}'
+
+
+def runIsland(islandIndex, problem, seed, alnsParameters, migrationInterval, acceptancePolicy, migrateWeights,
+              registerHistory, deadline, inbox, outbox):
+    """
+    Function that executes the ALNS of one island in its own process. After every
+    migrationInterval iterations the island sends its best solution to the coordinator
+    and waits for the migrants it receives in return.
+
+    Messages to the coordinator are ('migrate', island, route nodes, distance, wDestroy, wRepair, finished),
+    ('result', island, statistics, route nodes) and ('error', island, traceback).
+    """
+    try:
+        alns = ALNS(problem, randomSeed = seed, **alnsParameters)
+        # every island saves its own history
+        alns.register_weights_over_time = registerHistory
+        alns.register_objective_value_over_time = registerHistory
+        alns.historyFile = islandFileName(alns.historyFile, islandIndex)
+        with contextlib.redirect_stdout(io.StringIO()):
+            starttime = time.time()
+            alns.constructInitialSolution()
+
+            stop = False
+            i = 0
+            while not stop:
+                for _ in range(migrationInterval):
+                    alns.stopReason = alns.checkTermination(i)
+                    if alns.stopReason is not None:
+                        break
+                    alns.executeIteration(i)
+                    i += 1
+                if alns.stopReason is None and deadline is not None and time.time() >= deadline:
+                    alns.stopReason = 'time'
+                finished = alns.stopReason is not None
+                best = alns.bestSolution
+                outbox.put(('migrate', islandIndex, [route.nodes.tolist() for route in best.routes], best.distance,
+                            alns.wDestroy, alns.wRepair, finished))
+
+                migrants, stop = inbox.get()
+                if migrants:
+                    # only the best migrant is offered, ties are broken by the lowest island index
+                    routeNodes = min(migrants, key = lambda migrant: migrant[1])[0]
+                    acceptMigrant(alns, buildSolution(problem, routeNodes), acceptancePolicy)
+                    if migrateWeights:
+                        # the weights become the average of the weights of the island and the migrants
+                        n = len(migrants) + 1
+                        alns.wDestroy = [sum(weights) / n for weights in
+                                         zip(alns.wDestroy, *(migrant[2] for migrant in migrants))]
+                        alns.wRepair = [sum(weights) / n for weights in
+                                        zip(alns.wRepair, *(migrant[3] for migrant in migrants))]
+
+            if alns.stopReason is None:
+                alns.stopReason = 'migration'  # stopped because another island finished
+            alns.finish()
+            alns.cpuTime = round(time.time() - starttime, 3)
+        statistics = {'island': islandIndex}
+        statistics.update(runStatistics(alns, seed))
+        outbox.put(('result', islandIndex, statistics, [route.nodes.tolist() for route in alns.bestSolution.routes]))
+    except Exception:
+        outbox.put(('error', islandIndex, traceback.format_exc()))
+
+
+class IslandALNS:
+    """
+    Class that executes cooperating ALNS searches, the islands, in separate processes.
+    After every migrationInterval iterations the islands send their best solution to
+    the coordinator in the main process, which sends every island the solutions of its
+    neighbours in the topology. The islands exchange solutions at the same iterations,
+    so a result is reproducible from the base seed when no time budget is used.
+
+    Parameters
+    ----------
+    problem : PDPTW
+        The problem instance that we want to solve.
+    nIslands : int
+        number of islands, each in its own process.
+    alnsParameters : Dict
+        keyword arguments of ALNS except problem, randomSeed, timeLimit, checkpointFile and eventSink
+    migrationInterval : int
+        number of iterations between two migrations
+    topology : string
+        'ring': island i receives the best solution of island i - 1,
+        'broadcast': every island receives the best solutions of all other islands
+    acceptancePolicy : string
+        when a migrant replaces the current solution of an island, see acceptMigrant
+    migrateWeights : boolean
+        if True, the operator weights of an island are averaged with those of its migrants
+    registerHistory : boolean
+        if True, every island saves its history to the historyFile of the ALNS with the
+        island index added, see islandFileName
+    baseSeed : int
+        seed from which the seeds of the islands are derived as in MultiStartALNS
+    timeBudget : float
+        wall-clock time in seconds, the islands stop at the first migration after it, no limit if None
+    bestSolution : Solution
+        The best solution over all islands
+    islandStatistics : List of Dicts
+        statistics of every island, in order of the island index
+    """
+
+    TOPOLOGIES = ('ring', 'broadcast')
+    ACCEPTANCE_POLICIES = ('always', 'improving', 'best')
+
+    def __init__(self, problem, nIslands, alnsParameters, migrationInterval = 100, topology = 'ring',
+                 acceptancePolicy = 'improving', migrateWeights = False, registerHistory = False,
+                 baseSeed = Parameters.randomSeed, timeBudget = None):
+        # an island cannot be resumed from a checkpoint, and all islands would write to the same event sink
+        for name in ('checkpointFile', 'eventSink'):
+            if alnsParameters.get(name) is not None:
+                raise ValueError("Islands do not support the ALNS parameter " + name)
+        if topology not in self.TOPOLOGIES:
+            raise ValueError("Unknown topology " + str(topology))
+        if acceptancePolicy not in self.ACCEPTANCE_POLICIES:
+            raise ValueError("Unknown acceptance policy " + str(acceptancePolicy))
+        self.problem = problem
+        self.nIslands = nIslands
+        self.alnsParameters = alnsParameters
+        self.migrationInterval = migrationInterval
+        self.topology = topology
+        self.acceptancePolicy = acceptancePolicy
+        self.migrateWeights = migrateWeights
+        self.registerHistory = registerHistory
+        self.baseSeed = baseSeed
+        self.timeBudget = timeBudget
+        self.bestSolution = None
+        self.islandStatistics = []
+
+    def neighbours(self, islandIndex):
+        """
+        Method that returns the islands that send their best solution to an island
+        """
+        if self.nIslands == 1:
+            return []
+        if self.topology == 'ring':
+            return [(islandIndex - 1) % self.nIslands]
+        return [other for other in range(self.nIslands) if other != islandIndex]
+
+    def receive(self, outbox, kind):
+        """
+        Method that receives a message of the given kind from every island, by island index
+        """
+        messages = dict()
+        while len(messages) < self.nIslands:
+            message = outbox.get()
+            if message[0] == 'error':
+                raise Exception("Island " + str(message[1]) + " failed:\n" + message[2])
+            if message[0] != kind:
+                raise Exception("Unexpected message " + message[0] + " from island " + str(message[1]))
+            messages[message[1]] = message
+        return messages
+
+    def execute(self):
+        """
+        Method that executes the islands and returns the best solution
+        """
+        starttime = time.time()
+        deadline = None if self.timeBudget is None else starttime + self.timeBudget
+
+        outbox = mp.Queue()
+        inboxes = [mp.Queue() for _ in range(self.nIslands)]
+        processes = [mp.Process(target = runIsland,
+                                args = (islandIndex, self.problem, MultiStartALNS.deriveSeed(self.baseSeed, islandIndex),
+                                        self.alnsParameters, self.migrationInterval, self.acceptancePolicy,
+                                        self.migrateWeights, self.registerHistory, deadline, inboxes[islandIndex],
+                                        outbox))
+                     for islandIndex in range(self.nIslands)]
+        for process in processes:
+            process.start()
+        try:
+            nMigrations = 0
+            stop = False
+            while not stop:
+                messages = self.receive(outbox, 'migrate')
+                # all islands stop together, as soon as one of them is finished
+                stop = any(message[6] for message in messages.values())
+                for islandIndex in range(self.nIslands):
+                    migrants = [messages[other][2:6] for other in self.neighbours(islandIndex)]
+                    inboxes[islandIndex].put((migrants, stop))
+                nMigrations += 1
+            results = self.receive(outbox, 'result')
+        finally:
+            for process in processes:
+                process.join(timeout = 1)
+                if process.is_alive():
+                    process.terminate()
+
+        self.islandStatistics = [results[islandIndex][2] for islandIndex in range(self.nIslands)]
+        # ties are broken by the lowest island index
+        bestIsland = min(range(self.nIslands), key = lambda island: self.islandStatistics[island]['distance'])
+        self.bestSolution = buildSolution(self.problem, results[bestIsland][3])
+
+        cpuTime = round(time.time() - starttime, 3)
+        print("Terminated " + str(self.nIslands) + " islands after " + str(nMigrations) + " migrations. Best distance: " +
+              str(self.bestSolution.distance) + " on island " + str(bestIsland) + ", cpuTime: " + str(cpuTime) +
+              " seconds")
+        return self.bestSolution
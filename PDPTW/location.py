@@ -3,7 +3,8 @@ import math
 class Location:
     """
     Class that represents either (i) a location where a request should be picked up
-    or delivered or (ii) the depot
+    or delivered or (ii) the depot. Locations are shared by all solutions and are
+    never modified after they are created, the schedule of a route is kept by the route.
     Attributes
     ----------
     requestID : int
@@ -25,21 +26,32 @@ class Location:
     nodeID : int
         id of the node, used for the distance matrix
     """
+    __slots__ = ('requestID', 'xLoc', 'yLoc', 'demand', 'startTW', 'endTW', 'servTime', 'typeLoc', 'nodeID')
 
-    def __init__(self, requestID, xLoc, yLoc, demand, startTW, endTW, servTime, servStartTime, typeLoc, nodeID):
-        self.requestID = requestID
-        self.xLoc = xLoc
-        self.yLoc = yLoc
-        self.demand = demand
-        self.startTW = startTW
-        self.endTW = endTW
-        self.servTime = servTime
-        self.servStartTime = servStartTime
-        self.typeLoc = typeLoc
-        self.nodeID = nodeID
+    def __init__(self, requestID, xLoc, yLoc, demand, startTW, endTW, servTime, typeLoc, nodeID):
+        setAttribute = super().__setattr__
+        setAttribute('requestID', requestID)
+        setAttribute('xLoc', xLoc)
+        setAttribute('yLoc', yLoc)
+        setAttribute('demand', demand)
+        setAttribute('startTW', startTW)
+        setAttribute('endTW', endTW)
+        setAttribute('servTime', servTime)
+        setAttribute('typeLoc', typeLoc)
+        setAttribute('nodeID', nodeID)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Location is immutable, cannot set " + name)
+
+    def __delattr__(self, name):
+        raise AttributeError("Location is immutable, cannot delete " + name)
+
+    def __reduce__(self):
+        # rebuild through the constructor, as pickle cannot set the attributes of an immutable location
+        return (Location, tuple(getattr(self, name) for name in Location.__slots__))
 
     def __str__(self):
-        return (f"requestID: {self.requestID}; demand: {self.demand}; startTW: {self.startTW}; endTW: {self.endTW}; servTime:{self.servTime}; servStartTime: {self.servStartTime}; typeLoc: {self.typeLoc}, nodeID: {self.nodeID}")
+        return (f"requestID: {self.requestID}; demand: {self.demand}; startTW: {self.startTW}; endTW: {self.endTW}; servTime:{self.servTime}; typeLoc: {self.typeLoc}, nodeID: {self.nodeID}")
 
     def print(self):
         """
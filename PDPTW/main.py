@@ -6,7 +6,7 @@ problem = PDPTW.readInstance(testI)
 
 # Static parameters
 nDestroyOps = 9
-nRepairOps = 3
+nRepairOps = 4
 minSizeNBH = 1
 nIterations = 2800
 
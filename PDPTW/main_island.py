@@ -0,0 +1,36 @@
+from pdptw import PDPTW
+from island import IslandALNS
+
+if __name__ == '__main__':
+    testI = "Instances/lrc104.txt"
+    problem = PDPTW.readInstance(testI)
+
+    # Static parameters
+    nDestroyOps = 9
+    nRepairOps = 4
+    minSizeNBH = 1
+    nIterations = 2800
+
+    # Parameters to tune:
+    maxPercentageNHB = 5
+    tau = 0.03
+    coolingRate = 0.9990
+    decayParameter = 0.15
+    noise = 0.015
+
+    # Islands
+    nIslands = 8
+    migrationInterval = 100  # iterations between two migrations
+    topology = 'ring'  # 'ring' or 'broadcast'
+    acceptancePolicy = 'improving'  # 'always', 'improving' or 'best'
+    migrateWeights = False
+    timeBudget = None  # seconds of wall-clock time
+
+    alnsParameters = dict(nDestroyOps = nDestroyOps, nRepairOps = nRepairOps, nIterations = nIterations,
+                          minSizeNBH = minSizeNBH, maxPercentageNHB = maxPercentageNHB, tau = tau,
+                          coolingRate = coolingRate, decayParameter = decayParameter, noise = noise)
+    islands = IslandALNS(problem, nIslands, alnsParameters, migrationInterval, topology, acceptancePolicy,
+                         migrateWeights, timeBudget = timeBudget)
+    islands.execute()
+    for statistics in islands.islandStatistics:
+        print(statistics)
@@ -0,0 +1,32 @@
+from pdptw import PDPTW
+from multistart import MultiStartALNS
+
+if __name__ == '__main__':
+    testI = "Instances/lrc104.txt"
+    problem = PDPTW.readInstance(testI)
+
+    # Static parameters
+    nDestroyOps = 9
+    nRepairOps = 4
+    minSizeNBH = 1
+    nIterations = 2800
+
+    # Parameters to tune:
+    maxPercentageNHB = 5
+    tau = 0.03
+    coolingRate = 0.9990
+    decayParameter = 0.15
+    noise = 0.015
+
+    # Parallel runs
+    nRuns = 8
+    nWorkers = None  # number of CPUs
+    timeBudget = None  # seconds of wall-clock time shared by the runs
+
+    alnsParameters = dict(nDestroyOps = nDestroyOps, nRepairOps = nRepairOps, nIterations = nIterations,
+                          minSizeNBH = minSizeNBH, maxPercentageNHB = maxPercentageNHB, tau = tau,
+                          coolingRate = coolingRate, decayParameter = decayParameter, noise = noise)
+    multiStart = MultiStartALNS(problem, nRuns, nWorkers, alnsParameters, timeBudget = timeBudget)
+    multiStart.execute()
+    for statistics in multiStart.runStatistics:
+        print(statistics)
@@ -1,18 +1,18 @@
 import random
-import xlsxwriter
 import time
 
 import numpy as np
 
 from pdptw import PDPTW
 from alns import ALNS
+from reporting import createWorkbook
 
 
 class ScenarioAnalysis:
 
     # Constant parameters
-    nDestroyOps = 8
-    nRepairOps = 3
+    nDestroyOps = 9
+    nRepairOps = 4
     nIterations = 1000
     minSizeNBH = 1
 
@@ -55,7 +55,7 @@ class ScenarioAnalysis:
         Tuning percentage neighborhood parameter
         '''
 
-        workbook = xlsxwriter.Workbook('tune_percentage.xlsx')
+        workbook = createWorkbook('tune_percentage.xlsx')
         worksheet = workbook.add_worksheet()
 
         self.average_solution_per_percentage = []
@@ -105,7 +105,7 @@ class ScenarioAnalysis:
         Tuning tau parameter
         '''
 
-        workbook = xlsxwriter.Workbook('tune_tau.xlsx')
+        workbook = createWorkbook('tune_tau.xlsx')
         worksheet = workbook.add_worksheet()
 
         self.average_solution_per_tau = []
@@ -154,7 +154,7 @@ class ScenarioAnalysis:
         Tuning cooling factor
         '''
 
-        workbook = xlsxwriter.Workbook('tune_c.xlsx')
+        workbook = createWorkbook('tune_c.xlsx')
         worksheet = workbook.add_worksheet()
 
         self.average_solution_per_c = []
@@ -204,7 +204,7 @@ class ScenarioAnalysis:
         Tuning reaction factor
         '''
 
-        workbook = xlsxwriter.Workbook('tune_r.xlsx')
+        workbook = createWorkbook('tune_r.xlsx')
         worksheet = workbook.add_worksheet()
 
         self.average_solution_per_r = []
@@ -254,7 +254,7 @@ class ScenarioAnalysis:
         Tuning noise parameter
         '''
 
-        workbook = xlsxwriter.Workbook('tune_noise.xlsx')
+        workbook = createWorkbook('tune_noise.xlsx')
         worksheet = workbook.add_worksheet()
 
         self.average_solution_per_noise = []
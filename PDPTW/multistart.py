@@ -0,0 +1,119 @@
+import contextlib, io, time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from alns import ALNS
+from solution import buildSolution
+from parameters import Parameters
+
+# problem instance of a worker process, set once by initWorker
+workerProblem = None
+
+
+def initWorker(problem):
+    """
+    Function that stores the problem instance in a worker process, so that it is
+    sent to every worker once instead of with every run
+    """
+    global workerProblem
+    workerProblem = problem
+
+
+def runALNS(runIndex, seed, alnsParameters, deadline):
+    """
+    Function that executes one ALNS run in a worker process. Returns the statistics
+    of the run and the node lists of the routes of its best solution.
+    """
+    timeLimit = None if deadline is None else max(0, deadline - time.time())
+    alns = ALNS(workerProblem, randomSeed = seed, timeLimit = timeLimit, **alnsParameters)
+    # the output of the runs would be interleaved
+    with contextlib.redirect_stdout(io.StringIO()):
+        alns.execute()
+    statistics = {'run': runIndex}
+    statistics.update(runStatistics(alns, seed))
+    return statistics, [route.nodes.tolist() for route in alns.bestSolution.routes]
+
+
+def runStatistics(alns, seed):
+    """
+    Function that returns the statistics of a finished ALNS run with the given seed
+    """
+    bestSolution = alns.bestSolution
+    return {'seed': seed,
+            'distance': bestSolution.distance,
+            'nRoutes': len(bestSolution.routes),
+            'nIterations': alns.nIterationsDone,
+            'optimalIteration': alns.optimal_iteration_number,
+            'cpuTime': alns.cpuTime,
+            'stopReason': alns.stopReason}
+
+
+class MultiStartALNS:
+    """
+    Class that executes independent ALNS runs with different seeds in parallel and
+    keeps the best solution. The seed of a run only depends on the base seed and the
+    index of the run, so every run can be reproduced with ALNS(..., randomSeed = seed).
+
+    Parameters
+    ----------
+    problem : PDPTW
+        The problem instance that we want to solve.
+    nRuns : int
+        number of ALNS runs.
+    nWorkers : int
+        number of worker processes, the number of CPUs if None
+    alnsParameters : Dict
+        keyword arguments of ALNS except problem, randomSeed and timeLimit
+    baseSeed : int
+        seed from which the seeds of the runs are derived
+    timeBudget : float
+        wall-clock time in seconds shared by all runs, runs that start later get the
+        remaining time, no limit if None
+    bestSolution : Solution
+        The best solution over all runs
+    runStatistics : List of Dicts
+        statistics of every run, in order of the run index
+    """
+
+    def __init__(self, problem, nRuns, nWorkers, alnsParameters, baseSeed = Parameters.randomSeed, timeBudget = None):
+        self.problem = problem
+        self.nRuns = nRuns
+        self.nWorkers = nWorkers
+        self.alnsParameters = alnsParameters
+        self.baseSeed = baseSeed
+        self.timeBudget = timeBudget
+        self.bestSolution = None
+        self.runStatistics = []
+
+    @staticmethod
+    def deriveSeed(baseSeed, runIndex):
+        """
+        Method that returns the seed of a run, the seeds of different runs are
+        statistically independent
+        """
+        return int(np.random.SeedSequence(baseSeed, spawn_key = (runIndex,)).generate_state(1)[0])
+
+    def execute(self):
+        """
+        Method that executes the runs and returns the best solution
+        """
+        starttime = time.time()
+        deadline = None if self.timeBudget is None else starttime + self.timeBudget
+
+        with ProcessPoolExecutor(max_workers = self.nWorkers, initializer = initWorker,
+                                 initargs = (self.problem,)) as executor:
+            futures = [executor.submit(runALNS, runIndex, self.deriveSeed(self.baseSeed, runIndex),
+                                       self.alnsParameters, deadline) for runIndex in range(self.nRuns)]
+            results = [future.result() for future in futures]
+
+        self.runStatistics = [statistics for statistics, _ in results]
+        # ties are broken by the lowest run index
+        bestRun = min(range(self.nRuns), key = lambda run: self.runStatistics[run]['distance'])
+        self.bestSolution = buildSolution(self.problem, results[bestRun][1])
+
+        cpuTime = round(time.time() - starttime, 3)
+        print("Terminated " + str(self.nRuns) + " runs. Best distance: " + str(self.bestSolution.distance) +
+              " in run " + str(bestRun) + " with seed " + str(self.runStatistics[bestRun]['seed']) +
+              ", cpuTime: " + str(cpuTime) + " seconds")
+        return self.bestSolution
@@ -0,0 +1,106 @@
+class Operator:
+    """
+    Class that represents a destroy or repair operator of the ALNS and the statistics
+    of its calls
+
+    Parameters
+    ----------
+    name : string
+        name of the operator
+    method : function
+        method of Destroy or Repair that executes the operator
+    arguments : tuple of strings
+        names of the arguments of the method after self, in order, see OperatorRegistry
+    enabled : boolean
+        if False, the ALNS does not use the operator
+    calls : int
+        number of calls
+    totalTime : float
+        wall-clock time of all calls in seconds
+    changedRequests : int
+        number of requests removed or inserted by all calls
+    """
+
+    def __init__(self, name, method, arguments = (), enabled = True):
+        self.name = name
+        self.method = method
+        self.arguments = tuple(arguments)
+        self.enabled = enabled
+        self.calls = 0
+        self.totalTime = 0.0
+        self.changedRequests = 0
+
+    def execute(self, target, values):
+        """
+        Method that executes the operator on a Destroy or Repair object, the arguments
+        are looked up by name in values
+        """
+        self.method(target, *[values[argument] for argument in self.arguments])
+
+    def record(self, elapsed, changedRequests):
+        """
+        Method that records a call of the operator
+        """
+        self.calls += 1
+        self.totalTime += elapsed
+        self.changedRequests += changedRequests
+
+    def meanTime(self):
+        return self.totalTime / self.calls if self.calls > 0 else 0.0
+
+
+class OperatorRegistry:
+    """
+    Class that keeps the destroy or the repair operators of the ALNS by name, in order
+    of registration. The ALNS only uses the enabled operators, their numbers are their
+    positions in enabledOperators. The arguments of an operator are given by name:
+    'nRemove' (size of the neighbourhood), 'randomGen' (random number generator) and
+    'regretK' (number of routes in the regret).
+
+    Parameters
+    ----------
+    operators : List of Operators
+        all registered operators
+    operatorsByName : Dict
+        name -> Operator
+    """
+
+    def __init__(self):
+        self.operators = list()
+        self.operatorsByName = dict()
+
+    def register(self, name, method, arguments = (), enabled = True):
+        """
+        Method that adds an operator, its name must be unique
+        """
+        if name in self.operatorsByName:
+            raise ValueError("Operator " + name + " is already registered")
+        operator = Operator(name, method, arguments, enabled)
+        self.operators.append(operator)
+        self.operatorsByName[name] = operator
+        return operator
+
+    def enable(self, *names):
+        for name in names:
+            self.operatorsByName[name].enabled = True
+
+    def disable(self, *names):
+        for name in names:
+            self.operatorsByName[name].enabled = False
+
+    def enabledOperators(self):
+        return [operator for operator in self.operators if operator.enabled]
+
+    def printStatistics(self, title, scores, useTimes, weights):
+        """
+        Method that prints per enabled operator the number of calls, the time, the removed
+        or inserted requests, the score per call and per second, and the weight. The scores,
+        number of uses and weights are those of the ALNS, indexed by operator number.
+        """
+        print(f'{title:<20}{"calls":>8}{"total (s)":>11}{"mean (ms)":>11}{"requests":>10}'
+              f'{"score/call":>12}{"score/s":>10}{"weight":>8}')
+        for opNr, operator in enumerate(self.enabledOperators()):
+            scorePerCall = scores[opNr] / useTimes[opNr] if useTimes[opNr] > 0 else 0
+            scorePerSecond = scorePerCall / operator.meanTime() if operator.meanTime() > 0 else 0
+            print(f'{operator.name:<20}{operator.calls:>8}{operator.totalTime:>11.3f}{1000 * operator.meanTime():>11.3f}'
+                  f'{operator.changedRequests:>10}{scorePerCall:>12.3f}{scorePerSecond:>10.0f}{weights[opNr]:>8.3f}')
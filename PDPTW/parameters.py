@@ -4,4 +4,10 @@ class Parameters:
     w1 = 1.5  # if the new solution is a new global best
     w2 = 1.2  # if the new solution is better than the current one
     w3 = 0.8  # if the new solution is accepted
-    w4 = 0.6  # if the new solution is rejected
\ No newline at end of file
+    w4 = 0.6  # if the new solution is rejected
+    regretK = 3  # number of routes in the regret of the regret-k insertion, 0 for all routes (regret-m)
+    minVectorisedSize = 40  # number of requests times route length from which insertions are evaluated vectorised
+    shawWeights = (1, 1, 1)  # weights of the distance, start of time window and demand in the Shaw relatedness
+    nNearestNodes = 20  # length of the lists with nearest locations for the proximity-based removal
+    historyChunkSize = 10000  # number of iterations by which the history grows when the run is limited by time
+    importTimeBudget = 0.25  # seconds within which the solver core (alns and its modules) must import, see check_import_time.py
@@ -1,6 +1,7 @@
 import numpy as np
 from request import Request
 from location import Location
+from parameters import Parameters
 
 class PDPTW:
     """
@@ -13,12 +14,25 @@ class PDPTW:
         The set containing all requests.
     depot : Location
         the depot where all vehicles must start and end.
-    locations : Set of Locations
-        The set containing all locations
      distMatrix : 2D array
-         matrix with all distances between cities
+         symmetric matrix with all rounded distances between cities, indexed by nodeID,
+         as int16 or int32 depending on the largest distance
     capacity : int
         capacity of the vehicles
+    nodes : List of Locations
+        all locations indexed by nodeID, only used at the edges of the API
+    requestsByID : Dict
+        request ID -> Request
+    xLoc, yLoc, demand, startTW, endTW, servTime, typeLoc, requestID : 1D arrays
+        the attributes of all locations as contiguous arrays indexed by nodeID
+    shawRelatedness : 2D array
+        relatedness of every pair of locations used by the Shaw removal, lower is more related
+    nearestNodes : 2D array
+        per location the nodeIDs of the nearest locations, closest first
+    startTWOrder, demandOrder : Lists
+        nodeIDs sorted by the start of the time window and by the demand
+    sortedStartTW, sortedDemand : Lists
+        the start of the time window and the demand in the same order, to search with bisect
     
     """
 
@@ -27,19 +41,61 @@ class PDPTW:
         self.requests = requests
         self.depot = depot
         self.capacity = vehicleCapacity
-        ##construct the set with all locations
-        self.locations = set()
-        self.locations.add(depot)
+        self.requestsByID = {r.ID: r for r in self.requests}
+
+        # store the locations by nodeID, with their attributes as arrays
+        self.nodes = [None] * (2 * len(self.requests) + 1)
+        self.nodes[depot.nodeID] = depot
         for r in self.requests:
-            self.locations.add(r.pickUpLoc)
-            self.locations.add(r.deliveryLoc)
+            self.nodes[r.pickUpLoc.nodeID] = r.pickUpLoc
+            self.nodes[r.deliveryLoc.nodeID] = r.deliveryLoc
+        self.xLoc = np.array([loc.xLoc for loc in self.nodes], dtype = np.int64)
+        self.yLoc = np.array([loc.yLoc for loc in self.nodes], dtype = np.int64)
+        self.demand = np.array([loc.demand for loc in self.nodes], dtype = np.int64)
+        self.startTW = np.array([loc.startTW for loc in self.nodes], dtype = np.int64)
+        self.endTW = np.array([loc.endTW for loc in self.nodes], dtype = np.int64)
+        self.servTime = np.array([loc.servTime for loc in self.nodes], dtype = np.int64)
+        self.typeLoc = np.array([loc.typeLoc for loc in self.nodes], dtype = np.int8)
+        self.requestID = np.array([loc.requestID for loc in self.nodes], dtype = np.int32)
+
+        # compute the distance matrix, rounded half to even like Location.getDistance
+        dx = self.xLoc[:, None] - self.xLoc[None, :]
+        dy = self.yLoc[:, None] - self.yLoc[None, :]
+        distMatrix = np.rint(np.sqrt(dx * dx + dy * dy))
+        # insertion costs and detours add up to four distances, which must fit in the type as well
+        if 4 * distMatrix.max() <= np.iinfo(np.int16).max:
+            self.distMatrix = distMatrix.astype(np.int16)
+        else:
+            self.distMatrix = distMatrix.astype(np.int32)
+
+        self.shawRelatedness = self.computeShawRelatedness(*Parameters.shawWeights)
 
-        # compute the distance matrix
-        self.distMatrix = np.zeros((len(self.locations), len(self.locations)))  # init as nxn matrix
-        for i in self.locations:
-            for j in self.locations:
-                distItoJ = Location.getDistance(i, j)
-                self.distMatrix[i.nodeID, j.nodeID] = distItoJ
+        # neighbours of every location for the proximity, time-based and demand-based removal
+        nNearest = min(Parameters.nNearestNodes, len(self.nodes))
+        self.nearestNodes = np.argsort(self.distMatrix, axis = 1, kind = 'stable')[:, :nNearest]
+        startTWOrder = np.argsort(self.startTW, kind = 'stable')
+        self.startTWOrder = startTWOrder.tolist()
+        self.sortedStartTW = self.startTW[startTWOrder].tolist()
+        demandOrder = np.argsort(self.demand, kind = 'stable')
+        self.demandOrder = demandOrder.tolist()
+        self.sortedDemand = self.demand[demandOrder].tolist()
+
+    def computeShawRelatedness(self, distanceWeight, startTWWeight, demandWeight):
+        """
+        Method that computes the relatedness of every pair of locations: the weighted sum
+        of their distance, the difference of the start of their time windows and the
+        difference of their demand. Every component is normalised by its sum over the
+        pickups and deliveries in the same row.
+        """
+        pickUpsAndDeliveries = self.typeLoc != 0
+        components = [(distanceWeight, self.distMatrix),
+                      (startTWWeight, np.abs(self.startTW[:, None] - self.startTW[None, :])),
+                      (demandWeight, np.abs(self.demand[:, None] - self.demand[None, :]))]
+        relatedness = np.zeros(self.distMatrix.shape)
+        for weight, component in components:
+            sums = component[:, pickUpsAndDeliveries].sum(axis = 1, keepdims = True)
+            relatedness += weight * component / np.where(sums > 0, sums, 1)
+        return relatedness
 
     def print(self):
         print(" PDPTW problem " + self.name + " with " + str(
@@ -52,7 +108,6 @@ class PDPTW:
         """
         Method that reads an instance from a file and returns the instancesf
         """
-        servStartTime = 0
         f = open(fileName)
         requests = list()
         stations = list()
@@ -71,7 +126,7 @@ class PDPTW:
             y = int(asList[3][:-2])
             if lID.startswith("D"):
                 # it is the depot
-                depot = Location(0, x, y, 0, 0, 0, 0, servStartTime, 0, nodeCount)  # depot requestID=0
+                depot = Location(0, x, y, 0, 0, 0, 0, 0, nodeCount)  # depot requestID=0
                 nodeCount += 1
 
             elif lID.startswith("C"):
@@ -86,12 +141,12 @@ class PDPTW:
                     # it is a pick-up
                     if partnerID in unmatchedDeliveries:
                         deliv = unmatchedDeliveries.pop(partnerID)
-                        pickup = Location(deliv.requestID, x, y, demand, startTW, endTW, servTime, servStartTime, 1, nodeCount)
+                        pickup = Location(deliv.requestID, x, y, demand, startTW, endTW, servTime, 1, nodeCount)
                         nodeCount += 1
                         req = Request(pickup, deliv, deliv.requestID)
                         requests.append(req)
                     else:
-                        pickup = Location(requestCount, x, y, demand, startTW, endTW, servTime, servStartTime, 1, nodeCount)
+                        pickup = Location(requestCount, x, y, demand, startTW, endTW, servTime, 1, nodeCount)
                         nodeCount += 1
                         requestCount += 1
                         # lID -> partnerID
@@ -100,12 +155,12 @@ class PDPTW:
                     # it is a delivery
                     if partnerID in unmatchedPickups:
                         pickup = unmatchedPickups.pop(partnerID)
-                        deliv = Location(pickup.requestID, x, y, demand, startTW, endTW, servTime, servStartTime, -1, nodeCount)
+                        deliv = Location(pickup.requestID, x, y, demand, startTW, endTW, servTime, -1, nodeCount)
                         nodeCount += 1
                         req = Request(pickup, deliv, pickup.requestID)
                         requests.append(req)
                     else:
-                        deliv = Location(requestCount, x, y, demand, startTW, endTW, servTime, servStartTime, -1, nodeCount)
+                        deliv = Location(requestCount, x, y, demand, startTW, endTW, servTime, -1, nodeCount)
                         nodeCount += 1
                         requestCount += 1
                         unmatchedDeliveries[lID] = deliv
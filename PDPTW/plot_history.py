@@ -0,0 +1,8 @@
+import sys
+
+from reporting import plotHistory
+
+'''Offline tool that plots the history written by ALNS.execute: python plot_history.py [history.npz]'''
+
+if __name__ == '__main__':
+    plotHistory(sys.argv[1] if len(sys.argv) > 1 else 'history.npz')
@@ -1,5 +1,6 @@
-import sys
-from route import Route
+import sys, heapq
+from insertioncache import InsertionCache
+from operatorregistry import OperatorRegistry
 # from timeLog import Log
 # from Log.log import Log
 
@@ -15,25 +16,27 @@ class Repair:
         The current solution in the ALNS algorithm
     randomGen : Random
         random number generator
+    insertionCache : InsertionCache
+        best insertions of the unserved requests in the routes, shared by the passes of a repair
 
     '''
 
     def __init__(self, problem, solution):
         self.problem = problem
         self.solution = solution
+        self.insertionCache = InsertionCache(problem, solution.notServed)
 
-    def computeDiff(self, preNode, afterNode, insertNode):
+    @staticmethod
+    def createRegistry():
         '''
-        Method that calculates the cost of inserting a new node
-        Parameters
-        ----------
-        preNode: Location
-        afterNode: Location
-        insertNode: Location
+        Method that returns a registry with all repair methods, in order of their numbers
         '''
-
-        return self.problem.distMatrix[preNode.nodeID][insertNode.nodeID] + self.problem.distMatrix[afterNode.nodeID][
-            insertNode.nodeID] - self.problem.distMatrix[preNode.nodeID][afterNode.nodeID]
+        registry = OperatorRegistry()
+        registry.register('randomInsertion', Repair.executeRandomInsertion, ('randomGen',))
+        registry.register('greedyInsertion', Repair.executeGreedyInsertion)
+        registry.register('regretInsertion', Repair.executeRegretInsertion)
+        registry.register('regretKInsertion', Repair.executeRegretKInsertion, ('regretK',))
+        return registry
 
     def findRegretInsertion(self):
         '''
@@ -55,36 +58,24 @@ class Repair:
             # print('new request----------')
             # print(request)
             for route in self.solution.routes:
-                requestsCopy = route.requests.copy()
-                requestsCopy.add(request)
-                for i in range(1, len(route.locations)):
-                    for j in range(i + 1, len(route.locations) + 1):  # delivery after pickup
-                        locationsCopy = route.locations.copy()
-                        cost = route.compute_cost_add_one_request(i, j, request)
-                        locationsCopy.insert(i, request.pickUpLoc)
-                        locationsCopy.insert(j, request.deliveryLoc)  # depot at the end
-                        afterInsertion = Route(locationsCopy, requestsCopy, self.problem)
-                        if afterInsertion == None:
-                            continue
-                        # check if insertion is feasible
-                        if afterInsertion.feasible:
-                            inserted = True
-                            tempCost.append([cost, route, i, j])
+                # only the best two insertions of every route can be the best two overall,
+                # they are cached until the route changes
+                for insertion in self.insertionCache.findTwoBestInsertions(request, route):
+                    if insertion is not None:
+                        inserted = True
+                        cost, i, j = insertion
+                        tempCost.append([cost, route, i, j])
 
             # if we have only one feasible insertion
             if len(tempCost) == 1:
-                locList = [self.problem.depot, request.pickUpLoc, request.deliveryLoc, self.problem.depot]
-                newRoute = Route(locList, {request}, self.problem)
-                diff = newRoute.distance
+                diff = self.insertionCache.newRouteCost(request)
                 tempCost.append([diff, None, 0, 0])
 
             # if we were not able to insert, create a new route
             if not inserted:
                 # print('not insert')
                 # create a new route with the request
-                locList = [self.problem.depot, request.pickUpLoc, request.deliveryLoc, self.problem.depot]
-                newRoute = Route(locList, {request}, self.problem)
-                diff = newRoute.distance
+                diff = self.insertionCache.newRouteCost(request)
                 tempCost.append([diff, None, 0, 0])
 
             tempCost = sorted(tempCost, key = lambda d: d[0], reverse = False)
@@ -124,6 +115,97 @@ class Repair:
             # for route in self.solution.routes:
             #     route.print()
 
+    def computeRegret(self, request, routeOptions, k):
+        '''
+        Method that computes the regret-k value of a request: the sum of the differences
+        between the cost of its best insertion in the h-th best route and in the best route,
+        for h = 2, ..., k. A new route can always be opened, so missing routes cost as
+        much as a new route.
+
+        Parameters
+        ----------
+        request : Request
+        routeOptions : Dict
+            route -> best insertion (cost, i, j) of the request in that route
+        k : int
+            number of routes in the regret, 0 for all routes (regret-m)
+
+        Returns
+        -------
+        (regret, minCost)
+        '''
+        nRoutes = k if k > 0 else len(routeOptions) + 1
+        costs = [insertion[0] for insertion in routeOptions.values()]
+        costs += [self.insertionCache.newRouteCost(request)] * nRoutes
+        costs = heapq.nsmallest(nRoutes, costs)
+        regret = sum(cost - costs[0] for cost in costs[1:])
+        return regret, costs[0]
+
+    # @Log('time_output.csv')
+    def executeRegretKInsertion(self, k):
+        """
+        Method that inserts the unserved request with the largest regret-k value first
+        in the solution, ties are broken by the lowest insertion cost. The regret values
+        are kept in a max-heap. After an insertion only the insertions in the modified
+        route are evaluated again, and a request is only pushed again if its best insertion
+        in that route changed, the old entry in the heap is then skipped when it is popped.
+
+        This is repair method number 3 in the ALNS
+
+        Parameters
+        ----------
+        k : int
+            number of routes in the regret, 0 for all routes (regret-m)
+
+        """
+        routeOptions = dict()  # request ID -> {route: best insertion in the route}
+        stamps = dict()  # request ID -> number of the valid entry of the request in the heap
+        heap = []
+        for request in self.solution.notServed:
+            routeOptions[request.ID] = dict()
+            for route in self.solution.routes:
+                insertion = self.insertionCache.findBestInsertion(request, route)
+                if insertion is not None:
+                    routeOptions[request.ID][route] = insertion
+            stamps[request.ID] = 0
+            regret, minCost = self.computeRegret(request, routeOptions[request.ID], k)
+            heap.append((-regret, minCost, request.ID, 0))
+        heapq.heapify(heap)
+
+        while heap:
+            _, _, requestID, stamp = heapq.heappop(heap)
+            if stamps.get(requestID) != stamp:
+                continue  # outdated entry, or the request is already inserted
+            request = self.solution.getRequest(requestID)
+            options = routeOptions.pop(requestID)
+            del stamps[requestID]
+
+            # insert in the best route, or create a new route if that is cheaper
+            insertRoute = None
+            insertion = (self.insertionCache.newRouteCost(request), 0, 0)
+            for route in self.solution.routes:
+                option = options.get(route)
+                if option is None:
+                    continue
+                if option[0] < insertion[0] or (insertRoute is None and option[0] == insertion[0]):
+                    insertRoute = route
+                    insertion = option
+            self.solution.addRequest(request, insertRoute, insertion[1], insertion[2])
+
+            # the modified route can be a new route or a copy that replaced a shared route
+            changedRoute = self.solution.requestIndex[requestID][1]
+            for otherID, otherOptions in routeOptions.items():
+                other = self.solution.getRequest(otherID)
+                oldOption = otherOptions.pop(insertRoute, None)
+                newOption = self.insertionCache.findBestInsertion(other, changedRoute)
+                if newOption is not None:
+                    otherOptions[changedRoute] = newOption
+                if (oldOption is None) != (newOption is None) or (
+                        newOption is not None and newOption[0] != oldOption[0]):
+                    stamps[otherID] += 1
+                    regret, minCost = self.computeRegret(other, otherOptions, k)
+                    heapq.heappush(heap, (-regret, minCost, otherID, stamps[otherID]))
+
     # @Log('time_output.csv')
     def executeGreedyInsertion(self):
         """
@@ -135,34 +217,21 @@ class Repair:
 
         while len(self.solution.notServed) > 0:
             for req in self.solution.notServed:
-                inserted = False
                 minCost = sys.maxsize  # initialize as extremely large number
-                bestInsert = None  # if infeasible the bestInsert will be None
+                bestRoute = None  # if infeasible the bestRoute will be None
+                bestPositions = (0, 0)
                 for route in self.solution.routes:
-                    afterInsertion, cost = route.greedyInsert(req)
-                    if afterInsertion == None:
+                    insertion = self.insertionCache.findBestInsertion(req, route)
+                    if insertion is None:
                         continue
+                    cost, preNode_index, afterNode_index = insertion
                     if cost < minCost:
-                        inserted = True
-                        removedRoute = route
-                        bestInsert = afterInsertion
+                        bestRoute = route
+                        bestPositions = (preNode_index, afterNode_index)
                         minCost = cost
 
-                # if we were not able to insert, create a new route
-                if not inserted:
-                    # create a new route with the request
-                    locList = [self.problem.depot, req.pickUpLoc, req.deliveryLoc, self.problem.depot]
-                    newRoute = Route(locList, {req}, self.problem)
-                    self.solution.routes.append(newRoute)
-                    self.solution.distance += newRoute.distance
-                else:
-                    self.solution.routes.remove(removedRoute)
-                    self.solution.routes.append(bestInsert)
-                    self.solution.distance += minCost
-
-                # update the lists with served and notServed requests
-                self.solution.served.append(req)
-                self.solution.notServed.remove(req)
+                # insert in the best route, or create a new route if we were not able to insert
+                self.solution.addRequest(req, bestRoute, bestPositions[0], bestPositions[1])
 
     # @Log('time_output.csv')
     def executeRandomInsertion(self, randomGen):
@@ -189,27 +258,16 @@ class Repair:
             while len(potentialRoutes) > 0:
                 # pick a random route
                 randomRoute = randomGen.choice(potentialRoutes)
-                afterInsertion, cost = randomRoute.greedyInsert(req)
-                if afterInsertion == None:
+                cost, preNode_index, afterNode_index = randomRoute.findBestInsertion(req)
+                if preNode_index == None:
                     # insertion not feasible, remove route from potential routes
                     potentialRoutes.remove(randomRoute)
                 else:
-                    # insertion feasible, update routes and break from while loop
+                    # insertion feasible, update the route and break from while loop
                     inserted = True
-                    # print("Possible")
-                    self.solution.routes.remove(randomRoute)
-                    self.solution.routes.append(afterInsertion)
-                    self.solution.distance += cost
+                    self.solution.addRequest(req, randomRoute, preNode_index, afterNode_index)
                     break
 
-            # if we were not able to insert, create a new route
+            # if we were not able to insert, create a new route with the request
             if not inserted:
-                # create a new route with the request
-                locList = [self.problem.depot, req.pickUpLoc, req.deliveryLoc, self.problem.depot]
-                newRoute = Route(locList, {req}, self.problem)
-                self.solution.routes.append(newRoute)
-                self.solution.distance += newRoute.distance
-            # update the lists with served and notServed requests
-            self.solution.served.append(req)
-            self.solution.notServed.remove(req)
-
+                self.solution.addRequest(req, None, 0, 0)
@@ -0,0 +1,58 @@
+import numpy as np
+
+'''
+Reporting layer of the ALNS: plots and Excel files. The solver core only needs numpy,
+so matplotlib, pandas and xlsxwriter are imported when a report is made.
+'''
+
+
+def writeObjectiveValues(historyFile, fileName = 'Objective values.xlsx'):
+    """
+    Function that writes the objective value per iteration of a history file written
+    by ALNS.execute to an Excel file
+    """
+    import pandas as pd
+
+    with np.load(historyFile) as history:
+        objective_values = [int(value) for value in history['objectiveValues']]
+    df = pd.DataFrame(objective_values)
+    writer = pd.ExcelWriter(fileName, engine='xlsxwriter')
+    df.to_excel(writer, sheet_name='1', index=False)
+    writer.close()
+
+
+def createWorkbook(fileName):
+    """
+    Function that creates an Excel workbook, used for the tuning results of the scenario analysis
+    """
+    import xlsxwriter
+
+    return xlsxwriter.Workbook(fileName)
+
+
+def plotHistory(fileName):
+    """
+    Function that plots the operator weights and the objective values of a history
+    file written by ALNS.execute
+    """
+    import matplotlib.pyplot as plt
+
+    with np.load(fileName) as history:
+        objectiveValues = history['objectiveValues']
+        iterations_list = np.arange(0, len(objectiveValues))
+
+        # Plot weights of the operators over time
+        for weightsName, namesName in (('destroyWeights', 'destroyNames'), ('repairWeights', 'repairNames')):
+            weights = history[weightsName]
+            for opNr, name in enumerate(history[namesName]):
+                plt.plot(iterations_list, weights[:, opNr], label=str(name))
+            plt.xlabel('Iteration number', fontsize=12)
+            plt.ylabel('Weight', fontsize=12)
+            plt.legend(loc="upper right", fontsize='small')
+            plt.show()
+
+        # Plot objective values over time
+        plt.plot(iterations_list, objectiveValues)
+        plt.xlabel('Iteration number', fontsize=12)
+        plt.ylabel('Objective value', fontsize=12)
+        plt.show()
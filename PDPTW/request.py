@@ -1,4 +1,6 @@
 class Request:
+    __slots__ = ('pickUpLoc', 'deliveryLoc', 'ID')
+
     def __init__(self, pickUpLoc, deliveryLoc, ID):
         self.pickUpLoc = pickUpLoc
         self.deliveryLoc = deliveryLoc
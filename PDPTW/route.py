@@ -1,4 +1,6 @@
 import sys
+import numpy as np
+from parameters import Parameters
 
 class Route:
     """
@@ -6,8 +8,8 @@ class Route:
     
     Parameters
     ----------
-    locations : list of locations
-        the route sequence of locations.
+    nodes : 1D array of int
+        the route sequence as nodeIDs of the locations.
     requests : set of requests
         the requests served by the route
     problem : PDPTW
@@ -16,68 +18,122 @@ class Route:
         true if route respects time windows, capacity and precedence # delivery after pickup
     distance : int
         total distance driven, extremely large number if infeasible
+    arrivalTimes : list of int
+        arrival time at every position of the route
+    servStartTimes : list of int
+        service start time at every position of the route
+    waitingTimes : list of int
+        waiting time before the time window opens at every position
+    forwardSlack : list of int
+        maximum delay of the service start at every position that keeps the
+        rest of the route feasible
+    loads : list of int
+        load in the vehicle after leaving every position
+    prefixDistances : list of int
+        distance driven from the depot up to every position
+    version : int
+        number of changes of the schedule, used to invalidate cached insertions
     """
 
-    def __init__(self, locations, requests, problem):
-        self.locations = locations
+    def __init__(self, nodes, requests, problem):
+        self.nodes = np.array(nodes, dtype = np.int32)
         self.requests = requests
         self.problem = problem
-        # check the feasibility and compute the distance
+        self.version = 0
+        self.arrays = None  # (version, arrays) cached by scheduleArrays
+        # compute the schedule and the distance, and check the feasibility
+        self.computeSchedule()
         self.feasible = self.isFeasible()
-        if self.feasible:
-            self.distance = self.computeDistance()
-        else:
+        if not self.feasible:
             self.distance = sys.maxsize  # extremely large number
 
-    def calculateServiceStartTime(self):
-        curTime = 0
-        for i in range(1, len(self.locations) - 1):
-            prevNode = self.locations[i - 1]
-            curNode = self.locations[i]
-            dist = self.problem.distMatrix[prevNode.nodeID][curNode.nodeID]
-            curTime = max(curNode.startTW, curTime + prevNode.servTime + dist)
-            self.locations[i].servStartTime = curTime
+    @property
+    def locations(self):
+        """
+        The route sequence as Location objects, only used at the edges of the API
+        """
+        return [self.problem.nodes[node] for node in self.nodes.tolist()]
 
-    def computeDistance(self):
+    def nodeAttributes(self):
+        """
+        Method that gathers the start and end of the time windows, the service times
+        and demands of the nodes in the route, and the distances between consecutive
+        nodes, as lists
+        """
+        problem = self.problem
+        nodes = self.nodes
+        return (problem.startTW[nodes].tolist(), problem.endTW[nodes].tolist(), problem.servTime[nodes].tolist(),
+                problem.demand[nodes].tolist(), problem.distMatrix[nodes[:-1], nodes[1:]].tolist())
+
+    def computeSchedule(self):
         """
-        Method that computes and returns the distance of the route
+        Method that computes the arrival times, service start times, waiting times,
+        forward time slack, loads and prefix distances at every position of the
+        route. These are used to check the feasibility of an insertion in constant time.
         """
-        totDist = 0
+        nLocations = len(self.nodes)
+        self.arrivalTimes = [0] * nLocations
+        self.servStartTimes = [0] * nLocations
+        self.waitingTimes = [0] * nLocations
+        self.loads = [0] * nLocations
+        self.prefixDistances = [0] * nLocations
+        # the time window of the depot at the end is not checked, so it can be delayed indefinitely
+        self.forwardSlack = [sys.maxsize] * nLocations
+        self.updateSchedule(1, nLocations - 1)
 
-        # for i in range(1, len(self.locations) - 1):
-        for i in range(1, len(self.locations)):
-            prevNode = self.locations[i - 1]
-            curNode = self.locations[i]
-            dist = self.problem.distMatrix[prevNode.nodeID][curNode.nodeID]
-            totDist += dist
-        return totDist
+    def updateSchedule(self, firstIndex, lastIndex):
+        """
+        Method that patches the cached schedule after the positions firstIndex up
+        to lastIndex have changed. The positions after lastIndex keep their loads,
+        their prefix distance shifts by a constant and their times are only
+        recomputed until the service start time no longer changes.
+        """
+        self.version += 1
+        startTW, endTW, servTime, demand, arcs = self.nodeAttributes()
+        nLocations = len(self.nodes)
 
-    def computeDiff(self, preNode, afterNode, insertNode):
-        '''
-        Method that calculates the cost of inserting a new node
-        Parameters
-        ----------
-        preNode: Location
-        afterNode: Location
-        insertNode: Location
-        '''
-
-        return self.problem.distMatrix[preNode.nodeID][insertNode.nodeID] + self.problem.distMatrix[afterNode.nodeID][
-            insertNode.nodeID] - self.problem.distMatrix[preNode.nodeID][afterNode.nodeID]
-
-    # add this method
-    def compute_cost_add_one_request(self, preNode_index, afterNode_index, request):
-        locationsCopy = self.locations.copy()
-        locationsCopy.insert(preNode_index, request.pickUpLoc)
-        # calculate the cost after inserting pickup location
-        cost1 = self.computeDiff(locationsCopy[preNode_index - 1], locationsCopy[preNode_index + 1],
-                                 request.pickUpLoc)
-        locationsCopy.insert(afterNode_index, request.deliveryLoc)  # depot at the end
-        # calculte the cost after inserting delivery location
-        cost2 = self.computeDiff(locationsCopy[afterNode_index - 1],
-                                 locationsCopy[afterNode_index + 1],
-                                 request.deliveryLoc)
-        return cost2 + cost1
+        # recompute all values of the changed positions, arcs[i - 1] is the distance from i - 1 to i
+        for i in range(firstIndex, lastIndex + 1):
+            arrival = self.servStartTimes[i - 1] + servTime[i - 1] + arcs[i - 1]
+            self.arrivalTimes[i] = arrival
+            self.servStartTimes[i] = max(startTW[i], arrival)
+            self.waitingTimes[i] = self.servStartTimes[i] - arrival
+            self.loads[i] = self.loads[i - 1] + demand[i]
+            self.prefixDistances[i] = self.prefixDistances[i - 1] + arcs[i - 1]
+
+        # the positions after lastIndex only get a new predecessor at lastIndex + 1
+        stopIndex = lastIndex
+        if lastIndex + 1 < nLocations:
+            delta = self.prefixDistances[lastIndex] + arcs[lastIndex] - self.prefixDistances[lastIndex + 1]
+            if delta != 0:
+                for i in range(lastIndex + 1, nLocations):
+                    self.prefixDistances[i] += delta
+
+            for i in range(lastIndex + 1, nLocations):
+                arrival = self.servStartTimes[i - 1] + servTime[i - 1] + arcs[i - 1]
+                servStartTime = max(startTW[i], arrival)
+                self.arrivalTimes[i] = arrival
+                self.waitingTimes[i] = servStartTime - arrival
+                stopIndex = i
+                if servStartTime == self.servStartTimes[i]:
+                    # the rest of the route is not affected
+                    break
+                self.servStartTimes[i] = servStartTime
+
+        # update the forward time slack backwards, until it no longer changes before the changed positions
+        for i in range(min(stopIndex, nLocations - 2), 0, -1):
+            slack = min(endTW[i] - self.servStartTimes[i], self.waitingTimes[i + 1] + self.forwardSlack[i + 1])
+            if i < firstIndex and slack == self.forwardSlack[i]:
+                break
+            self.forwardSlack[i] = slack
+        self.distance = self.prefixDistances[-1]
+
+    def computeDistance(self):
+        """
+        Method that computes and returns the distance of the route from all its arcs,
+        Solution.checkConsistency compares it with the incrementally updated distance
+        """
+        return self.problem.distMatrix[self.nodes[:-1], self.nodes[1:]].sum().item()
 
     def print(self):
         """
@@ -90,96 +146,312 @@ class Route:
 
     def isFeasible(self):
         """
-        Method that checks feasbility. Returns True if feasible, else False
+        Method that checks feasbility with the computed schedule. Returns True if feasible, else False
         """
         # route should start and end at the depot
-        if self.locations[0] != self.problem.depot or self.locations[-1] != self.problem.depot:
+        depotID = self.problem.depot.nodeID
+        if self.nodes[0] != depotID or self.nodes[-1] != depotID:
             return False
 
-        curTime = 0  # current time
-        curLoad = 0  # current load in vehicle
-        curNode = self.locations[0]  # current node
-        pickedUp = set()  # set with all requests that we picked up, used to check precedence
-
-        # iterate over route and check feasibility of time windows, capacity and precedence
-        for i in range(1, len(self.locations) - 1):
-            prevNode = self.locations[i - 1]
-            curNode = self.locations[i]
-            dist = self.problem.distMatrix[prevNode.nodeID][curNode.nodeID]
-            # velocity = 1 dist = time
-            curTime = max(curNode.startTW, curTime + prevNode.servTime + dist)
+        # check if time windows are respected and capacity is not exceeded, velocity = 1 dist = time
+        interior = self.nodes[1:-1]
+        if np.any(np.array(self.servStartTimes[1:-1]) > self.problem.endTW[interior]):
+            return False
+        if max(self.loads[1:-1], default = 0) > self.problem.capacity:
+            return False
 
-            # check if time window is respected
-            if curTime > curNode.endTW:
-                return False
-            # check if capacity not exceeded
-            curLoad += curNode.demand
-            if curLoad > self.problem.capacity:
-                return False
-            # check if we don't do a delivery before a pickup
-            if curNode.typeLoc == 1:
+        # check if we don't do a delivery before a pickup
+        pickedUp = set()  # set with all requests that we picked up, used to check precedence
+        for typeLoc, requestID in zip(self.problem.typeLoc[interior].tolist(),
+                                      self.problem.requestID[interior].tolist()):
+            if typeLoc == 1:
                 # it is a pickup
-                pickedUp.add(curNode.requestID)
+                pickedUp.add(requestID)
             else:
                 # it is a delivery
                 # check if we picked up the request
-                if curNode.requestID not in pickedUp:
+                if requestID not in pickedUp:
                     return False
-                pickedUp.remove(curNode.requestID)
+                pickedUp.remove(requestID)
 
         # finally, check if all pickups have been delivered
         if len(pickedUp) > 0:
             return False
         return True
 
+    def findPositions(self, request):
+        """
+        Method that returns the positions of the pickup and the delivery of a request in the route
+        """
+        nodes = self.nodes.tolist()
+        return nodes.index(request.pickUpLoc.nodeID), nodes.index(request.deliveryLoc.nodeID)
+
     def removeRequest(self, request):
         """
-        Method that removes a request from the route. 
+        Method that removes a request from the route. Returns the decrease in distance.
         """
         # remove the request, the pickup and the delivery
         self.requests.remove(request)
-        self.locations.remove(request.pickUpLoc)
-        self.locations.remove(request.deliveryLoc)
-        # the distance changes, so update
-        # revise.
-        # self.distance = self.computeDistance()
-
-        # *** add this method
+        pickUpIndex, deliveryIndex = self.findPositions(request)
+        self.nodes = np.delete(self.nodes, [pickUpIndex, deliveryIndex])
+        for positions in (self.arrivalTimes, self.servStartTimes, self.waitingTimes,
+                          self.forwardSlack, self.loads, self.prefixDistances):
+            del positions[deliveryIndex]
+            del positions[pickUpIndex]
+        # the distance changes, so update the schedule from the pickup onwards
+        oldDistance = self.distance
+        self.updateSchedule(pickUpIndex, deliveryIndex - 1)
+        return oldDistance - self.distance
 
     def addRequest(self, request, preNode_index, afterNode_index):
         """
-        Method that add a request to the route.
-         """
+        Method that add a request to the route. Returns the increase in distance,
+        or None if the insertion is infeasible (the increase itself can be negative).
+        """
+        if not self.isInsertionFeasible(request, preNode_index, afterNode_index):
+            return None
+        return self.insertRequest(request, preNode_index, afterNode_index)
+
+    def insertRequest(self, request, preNode_index, afterNode_index):
+        """
+        Method that inserts a request in the route without checking feasibility,
+        for instance to undo its removal. Returns the increase in distance.
+        """
         # add the request, the pickup and the delivery
-        requestsCopy = self.requests.copy()
-        locationsCopy = self.locations.copy()
-        requestsCopy.add(request)
-        locationsCopy.insert(preNode_index, request.pickUpLoc)
-        locationsCopy.insert(afterNode_index, request.deliveryLoc)
-        afterInsertion = Route(locationsCopy, requestsCopy, self.problem)
-        if afterInsertion.feasible:
-            self.requests.add(request)
-            self.locations.insert(preNode_index, request.pickUpLoc)
-            self.locations.insert(afterNode_index, request.deliveryLoc)
-            cost = self.compute_cost_add_one_request(preNode_index, afterNode_index, request)
-            # revise.
-            # self.distance = self.computeDistance()
-            return cost
-        else:
-            return - 1
+        self.requests.add(request)
+        self.nodes = np.insert(self.nodes, [preNode_index, afterNode_index - 1],
+                               [request.pickUpLoc.nodeID, request.deliveryLoc.nodeID])
+        for positions in (self.arrivalTimes, self.servStartTimes, self.waitingTimes,
+                          self.forwardSlack, self.loads, self.prefixDistances):
+            positions.insert(preNode_index, 0)
+            positions.insert(afterNode_index, 0)
+        oldDistance = self.distance
+        self.updateSchedule(preNode_index, afterNode_index)
+        return self.distance - oldDistance
 
     def copy(self):
         """
-        Method that returns a copy of the route
+        Method that returns a copy of the route, including its cached schedule
+        """
+        copy = Route.__new__(Route)
+        copy.nodes = self.nodes.copy()
+        copy.requests = self.requests.copy()
+        copy.problem = self.problem
+        copy.feasible = self.feasible
+        copy.distance = self.distance
+        copy.arrivalTimes = self.arrivalTimes.copy()
+        copy.servStartTimes = self.servStartTimes.copy()
+        copy.waitingTimes = self.waitingTimes.copy()
+        copy.forwardSlack = self.forwardSlack.copy()
+        copy.loads = self.loads.copy()
+        copy.prefixDistances = self.prefixDistances.copy()
+        copy.version = self.version
+        copy.arrays = self.arrays
+        return copy
+
+    def isInsertionFeasible(self, request, preNode_index, afterNode_index):
+        """
+        Method that checks with the cached schedule if inserting the pickup of a
+        request at preNode_index and the delivery at afterNode_index is feasible
+        """
+        distMatrix = self.problem.distMatrix
+        capacity = self.problem.capacity
+        pickUp = request.pickUpLoc
+        delivery = request.deliveryLoc
+        startTW, endTW, servTime, demand, arcs = self.nodeAttributes()
+        if self.loads[preNode_index - 1] + pickUp.demand > capacity:
+            return False
+        prevNode = self.nodes[preNode_index - 1]
+        curTime = max(pickUp.startTW, self.servStartTimes[preNode_index - 1] + servTime[preNode_index - 1]
+                      + distMatrix[prevNode, pickUp.nodeID].item())
+        if curTime > pickUp.endTW:
+            return False
+        # the nodes between the pickup and the delivery carry the request
+        curServTime = pickUp.servTime
+        curDist = distMatrix[pickUp.nodeID, self.nodes[preNode_index]].item()
+        for i in range(preNode_index, afterNode_index - 1):
+            curTime = max(startTW[i], curTime + curServTime + curDist)
+            if curTime > endTW[i] or self.loads[i] + pickUp.demand > capacity:
+                return False
+            curServTime = servTime[i]
+            curDist = arcs[i]
+        lastNode = self.nodes[afterNode_index - 2] if afterNode_index > preNode_index + 1 else pickUp.nodeID
+        startDelivery = max(delivery.startTW, curTime + curServTime + distMatrix[lastNode, delivery.nodeID].item())
+        if startDelivery > delivery.endTW:
+            return False
+        # check if the rest of the route can absorb the delay
+        nextIndex = afterNode_index - 1
+        newStart = max(startTW[nextIndex], startDelivery + delivery.servTime
+                       + distMatrix[delivery.nodeID, self.nodes[nextIndex]].item())
+        return newStart - self.servStartTimes[nextIndex] <= self.forwardSlack[nextIndex]
+
+    def scheduleArrays(self):
+        """
+        Method that returns the attributes of the nodes and the cached schedule of the
+        route as arrays, for the vectorised insertion costs. They are computed once
+        per version of the route.
+        """
+        if self.arrays is not None and self.arrays[0] == self.version:
+            return self.arrays[1]
+        nodes = self.nodes
+        problem = self.problem
+        k = np.arange(len(nodes) - 1)
+        arcs = problem.distMatrix[nodes[:-1], nodes[1:]]
+        servTime = problem.servTime[nodes]
+        startTW = problem.startTW[nodes]
+        # travel and service time from the depot up to every position, and for every pickup
+        # position i and later position k the latest start of a time window between them,
+        # minus the travel and service time up to that time window
+        travel = np.concatenate(([0], np.cumsum(servTime[:-1] + arcs)))
+        windows = np.where(k[None, :] > k[:, None] + 1, startTW[k] - travel[k], -np.inf)
+        arrays = (startTW, problem.endTW[nodes], servTime, arcs, travel, np.maximum.accumulate(windows, axis = 1),
+                  np.array(self.servStartTimes), np.array(self.forwardSlack, dtype = np.float64), np.array(self.loads))
+        self.arrays = (self.version, arrays)
+        return arrays
+
+    def insertionCosts(self, requests):
+        """
+        Method that computes the increase in distance of all insertions of the pickup
+        and delivery of a list of requests at once, with the cached schedule of the
+        route and without building any route. Infeasible insertions, because of time
+        windows, capacity or the forward time slack of the rest of the route, get cost inf.
+
+        Parameters
+        ----------
+        requests : list of Requests
+            the requests that should be inserted.
+
+        Returns
+        -------
+        costs : 3D array
+            costs[r, i, j] is the increase in distance when the pickup of request r is
+            inserted at index i and the delivery at index j of the route after inserting
+            the pickup.
+        """
+        problem = self.problem
+        distMatrix = problem.distMatrix
+        capacity = problem.capacity
+        nodes = self.nodes
+        nLocations = len(nodes)
+        startTW, endTW, servTime, arcs, travel, windows, servStartTimes, forwardSlack, loads = self.scheduleArrays()
+        # attributes of the pickups and deliveries as columns, one row per request
+        pickUps = np.array([request.pickUpLoc.nodeID for request in requests])
+        deliveries = np.array([request.deliveryLoc.nodeID for request in requests])
+        pickUpStartTW, pickUpEndTW = problem.startTW[pickUps, None], problem.endTW[pickUps, None]
+        pickUpServTime, pickUpDemand = problem.servTime[pickUps, None], problem.demand[pickUps, None]
+        deliveryStartTW, deliveryEndTW = problem.startTW[deliveries, None], problem.endTW[deliveries, None]
+        deliveryServTime = problem.servTime[deliveries, None]
+        # distances from and to the pickup and delivery for every position of the route
+        # the distance matrix is symmetric, so one row gives the distances in both directions
+        pickUpDistances = distMatrix[pickUps[:, None], nodes[None, :]]
+        deliveryDistances = distMatrix[deliveries[:, None], nodes[None, :]]
+        toPickUp, fromPickUp = pickUpDistances[:, :-1], pickUpDistances[:, 1:]
+        toDelivery, fromDelivery = deliveryDistances[:, :-1], deliveryDistances[:, 1:]
+        pickUpToDelivery = distMatrix[pickUps, deliveries][:, None]
+
+        # pickup between i - 1 and i, for i = 1, ..., nLocations - 1 in the columns
+        startPickUp = np.maximum(pickUpStartTW, servStartTimes[:-1] + servTime[:-1] + toPickUp)
+        pickUpFeasible = (loads[:-1] + pickUpDemand <= capacity) & (startPickUp <= pickUpEndTW)
+
+        # delivery after the nodes i, ..., k of the original route, axis 1 is i and axis 2 is k
+        k = np.arange(nLocations - 1)
+        after = k[None, :] >= k[:, None] + 1
+        # service start time at node k after inserting the pickup at i: either the delayed
+        # start at i plus the travel and service times from i to k, or the start of a time
+        # window between i and k plus the travel and service times from there
+        startI = np.maximum(startTW[1:], startPickUp + pickUpServTime + fromPickUp)
+        startK = np.maximum(startI[:, :, None] + (travel[:-1][None, :] - travel[1:][:, None]),
+                            travel[:-1][None, :] + windows)
+        # node k now carries the request, every later delivery position carries it as well
+        carrying = ((startK <= endTW[:-1]) & (loads[:-1] + pickUpDemand[:, :, None] <= capacity)) | ~after
+        carrying = np.logical_and.accumulate(carrying, axis = 2) & after & pickUpFeasible[:, :, None]
+        startDelivery = np.maximum(deliveryStartTW[:, :, None], startK + servTime[:-1] + toDelivery[:, None, :])
+        newStart = np.maximum(startTW[1:], startDelivery + deliveryServTime[:, :, None] + fromDelivery[:, None, :])
+        feasible = carrying & (startDelivery <= deliveryEndTW[:, :, None]) & (
+                newStart - servStartTimes[1:] <= forwardSlack[1:])
+        costs = np.full((len(requests), nLocations, nLocations + 1), np.inf)
+        costs[:, 1:, 2:] = np.where(feasible, (toPickUp + fromPickUp - arcs)[:, :, None]
+                                    + (toDelivery + fromDelivery - arcs)[:, None, :], np.inf)
+
+        # delivery directly after the pickup, the rest of the route must absorb the delay
+        startDelivery = np.maximum(deliveryStartTW, startPickUp + pickUpServTime + pickUpToDelivery)
+        newStart = np.maximum(startTW[1:], startDelivery + deliveryServTime + fromDelivery)
+        feasible = pickUpFeasible & (startDelivery <= deliveryEndTW) & (newStart - servStartTimes[1:] <= forwardSlack[1:])
+        i = np.arange(1, nLocations)
+        costs[:, i, i + 1] = np.where(feasible, toPickUp + pickUpToDelivery + fromDelivery - arcs, np.inf)
+        return costs
+
+    def feasibleInsertions(self, request):
+        """
+        Generator over all feasible insertions of the pickup and delivery of a
+        request, in the order pickup index i, delivery index j. Every candidate
+        is checked in constant time with the cached schedule of the route,
+        without building the route after insertion. Faster than insertionCosts
+        for a single request and a short route.
+
+        Parameters
+        ----------
+        request : Request
+            the request that should be inserted.
+
+        Yields
+        ------
+        (cost, i, j)
+            the increase in distance when the pickup is inserted at index i and
+            the delivery at index j of the route after inserting the pickup.
         """
-        locationsCopy = self.locations.copy()
-        requestsCopy = self.requests.copy()
-        return Route(locationsCopy, requestsCopy, self.problem)
+        distMatrix = self.problem.distMatrix
+        capacity = self.problem.capacity
+        pickUp = request.pickUpLoc
+        delivery = request.deliveryLoc
+        nodes = self.nodes
+        nLocations = len(nodes)
+        startTW, endTW, servTime, demand, arcs = self.nodeAttributes()
+        # distances from and to the pickup and delivery for every position of the route
+        # the distance matrix is symmetric, so one row gives the distances in both directions
+        toPickUp = fromPickUp = distMatrix[pickUp.nodeID, nodes].tolist()
+        toDelivery = fromDelivery = distMatrix[delivery.nodeID, nodes].tolist()
+        pickUpToDelivery = distMatrix[pickUp.nodeID, delivery.nodeID].item()
+
+        for i in range(1, nLocations):
+            # check capacity and time window of the pickup between i - 1 and i
+            if self.loads[i - 1] + pickUp.demand > capacity:
+                continue
+            startPickUp = max(pickUp.startTW, self.servStartTimes[i - 1] + servTime[i - 1] + toPickUp[i - 1])
+            if startPickUp > pickUp.endTW:
+                continue
+
+            # delivery directly after the pickup, the rest of the route must absorb the delay
+            startDelivery = max(delivery.startTW, startPickUp + pickUp.servTime + pickUpToDelivery)
+            if startDelivery <= delivery.endTW:
+                newStart = max(startTW[i], startDelivery + delivery.servTime + fromDelivery[i])
+                if newStart - self.servStartTimes[i] <= self.forwardSlack[i]:
+                    cost = toPickUp[i - 1] + pickUpToDelivery + fromDelivery[i] - arcs[i - 1]
+                    yield cost, i, i + 1
 
-    def greedyInsert(self, request):
+            # delivery after the nodes i, ..., k of the original route
+            costPickUp = toPickUp[i - 1] + fromPickUp[i] - arcs[i - 1]
+            curTime = startPickUp
+            curServTime = pickUp.servTime
+            curDist = fromPickUp[i]
+            for k in range(i, nLocations - 1):
+                curTime = max(startTW[k], curTime + curServTime + curDist)
+                # node k now carries the request, every later delivery position carries it as well
+                if curTime > endTW[k] or self.loads[k] + pickUp.demand > capacity:
+                    break
+                startDelivery = max(delivery.startTW, curTime + servTime[k] + toDelivery[k])
+                if startDelivery <= delivery.endTW:
+                    newStart = max(startTW[k + 1], startDelivery + delivery.servTime + fromDelivery[k + 1])
+                    if newStart - self.servStartTimes[k + 1] <= self.forwardSlack[k + 1]:
+                        cost = costPickUp + toDelivery[k] + fromDelivery[k + 1] - arcs[k]
+                        yield cost, i, k + 2
+                curServTime = servTime[k]
+                curDist = arcs[k]
+
+    def findBestInsertion(self, request):
         """
-        Method that inserts the pickup and delivery of a request at the positions
-        that give the shortest total distance. Returns best route. 
+        Method that finds the positions for the pickup and delivery of a request
+        that give the shortest total distance, without modifying the route.
 
         Parameters
         ----------
@@ -188,32 +460,60 @@ class Route:
 
         Returns
         -------
-        bestInsert : Route
-            Route with the best insertion.
-
-        """
-        requestsCopy = self.requests.copy()
-        requestsCopy.add(request)
-        # print('request ', request)
-
-        minDist = sys.maxsize  # initialize as extremely large number
-        bestInsert = None  # if infeasible the bestInsert will be None
-        minCost = sys.maxsize
-        # iterate over all possible insertion positions for pickup and delivery
-
-        for i in range(1, len(self.locations)):
-            for j in range(i + 1, len(self.locations) + 1):  # delivery after pickup
-                locationsCopy = self.locations.copy()
-                locationsCopy.insert(i, request.pickUpLoc)
-                locationsCopy.insert(j, request.deliveryLoc)  # depot at the end
-                afterInsertion = Route(locationsCopy, requestsCopy, self.problem)
-                # check if insertion is feasible
-                if afterInsertion.feasible:
-                    # check if cheapest
-                    # revise. only calculate the cost
-                    cost = self.compute_cost_add_one_request(i, j, request)
-                    if cost < minCost:
-                        bestInsert = afterInsertion
-                        minCost = cost
-        return bestInsert, minCost
+        (minCost, preNode_index, afterNode_index)
+            the increase in distance and the positions of the best insertion,
+            the positions are None if no insertion is feasible.
+        """
+        best = self.findTwoBestInsertions([request])[0][0]
+        if best is None:
+            return sys.maxsize, None, None
+        return best
+
+    def findTwoBestInsertions(self, requests):
+        """
+        Method that finds the best and the second best positions for the pickup
+        and delivery of every request in a list, without modifying the route. Of
+        insertions with equal cost the first one in the order i, j is preferred.
+
+        Parameters
+        ----------
+        requests : list of Requests
+            the requests that should be inserted.
+
+        Returns
+        -------
+        list of (best, secondBest)
+            per request the insertions as (cost, preNode_index, afterNode_index),
+            None if there are less feasible insertions.
+        """
+        if len(requests) * len(self.nodes) < Parameters.minVectorisedSize:
+            # the overhead of the vectorised computation is larger than the computation itself
+            insertions = []
+            for request in requests:
+                best = None
+                secondBest = None
+                for insertion in self.feasibleInsertions(request):
+                    if best is None or insertion[0] < best[0]:
+                        secondBest = best
+                        best = insertion
+                    elif secondBest is None or insertion[0] < secondBest[0]:
+                        secondBest = insertion
+                insertions.append((best, secondBest))
+            return insertions
 
+        costs = self.insertionCosts(requests).reshape(len(requests), -1)
+        nColumns = len(self.nodes) + 1
+        rows = np.arange(len(requests))
+        # argmin returns the first minimum, which is the first one in the order i, j
+        bestIndices = np.argmin(costs, axis = 1)
+        bestCosts = costs[rows, bestIndices]
+        costs[rows, bestIndices] = np.inf
+        secondIndices = np.argmin(costs, axis = 1)
+        secondCosts = costs[rows, secondIndices]
+        insertions = []
+        for bestCost, bestIndex, secondCost, secondIndex in zip(bestCosts.tolist(), bestIndices.tolist(),
+                                                                  secondCosts.tolist(), secondIndices.tolist()):
+            best = (bestCost,) + divmod(bestIndex, nColumns) if bestCost != np.inf else None
+            secondBest = (secondCost,) + divmod(secondIndex, nColumns) if secondCost != np.inf else None
+            insertions.append((best, secondBest))
+        return insertions
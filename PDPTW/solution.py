@@ -1,4 +1,6 @@
+import numpy as np
 from route import Route
+from indexedset import IndexedSet
 
 class Solution:
     """
@@ -10,19 +12,36 @@ class Solution:
         the problem that corresponds to this solution
     routes : List of Routes
          Routes in the current solution
-    served : List of Requests
+    served : IndexedSet of Requests
         Requests served in the current solution
-    notServed : List of Requests
+    notServed : IndexedSet of Requests
          Requests not served in the current solution 
+    requestIndex : Dict
+        request ID -> (Request, Route serving it or None if not served)
+    servedMask : 1D array of bool
+        true for the nodeIDs of the pickups and deliveries of the served requests
     distance : int
         total distance of the current solution
+    ownedRoutes : Set of Routes
+        Routes that are not shared with a copy of the solution and can be modified in place
+    journal : List of tuples
+        Changes since startJournal, used to roll back a rejected candidate, None if not recording
     """
 
     def __init__(self, problem, routes, served, notServed):
         self.problem = problem
         self.routes = routes
-        self.served = served
-        self.notServed = notServed
+        self.served = IndexedSet(served)
+        self.notServed = IndexedSet(notServed)
+        self.requestIndex = {request.ID: (request, None) for request in self.notServed}
+        for route in routes:
+            for request in route.requests:
+                self.requestIndex[request.ID] = (request, route)
+        self.servedMask = np.zeros(len(problem.nodes), dtype = bool)
+        for route in routes:
+            self.servedMask[route.nodes[1:-1]] = True
+        self.ownedRoutes = set(routes)
+        self.journal = None
         self.distance = self.computeDistance()
 
     def computeDistance(self):
@@ -59,12 +78,9 @@ class Solution:
     def calculateMaxArc(self):
         max_arc_length = 0
         for route in self.routes:
-            for i in range(1, len(route.locations)):
-                first_node_ID = route.locations[i - 1].nodeID
-                second_node_ID = route.locations[i].nodeID
-                arc_length = self.problem.distMatrix[first_node_ID][second_node_ID]
-                if arc_length > max_arc_length:
-                    max_arc_length = arc_length
+            arc_length = self.problem.distMatrix[route.nodes[:-1], route.nodes[1:]].max()
+            if arc_length > max_arc_length:
+                max_arc_length = arc_length
         return max_arc_length
 
     def print(self):
@@ -97,7 +113,7 @@ class Solution:
             Used to generate random numbers
 
         """
-        print('nRemove = ' + str(nRemove))
+        # print('nRemove = ' + str(nRemove))
         for i in range(nRemove):
             # terminate if no more requests are served
             if len(self.served) == 0:
@@ -110,56 +126,219 @@ class Solution:
 
     def removeRequest(self, request):
         """
-        Method that removes a request from the solution
+        Method that removes a request from the solution. Returns the route it was removed from.
         """
-        # iterate over routes to find in which route the request is served
-        for route in self.routes:
-            if request in route.requests:
-                # remove the request from the route and break from loop
-                route.removeRequest(request)
-                break
-        # update lists with served and unserved requests
-        self.served.remove(request)
-        self.notServed.append(request)
-        # revise update distance
-        # self.computeDistance()
+        # look up the route in which the request is served and remove it from there
+        route = self.getWritableRoute(self.requestIndex[request.ID][1])
+        pickUpIndex, deliveryIndex = route.findPositions(request)
+        self.distance -= route.removeRequest(request)
+        # update sets with served and unserved requests
+        servedIndex = self.served.remove(request)
+        self.notServed.add(request)
+        self.requestIndex[request.ID] = (request, None)
+        self.setServed(request, False)
+        if self.journal is not None:
+            self.journal.append(('remove', route, request, pickUpIndex, deliveryIndex, servedIndex))
+        return route
 
     def addRequest(self, request, insertRoute, prevNode_index, afterNode_index):
         '''
-        Method that add a request to the solution
+        Method that add a request to the solution, in a new route if insertRoute is None
         '''
-        if insertRoute == None:
-            locList = [self.problem.depot, request.pickUpLoc, request.deliveryLoc, self.problem.depot]
-            newRoute = Route(locList, {request}, self.problem)
-            self.routes.append(newRoute)
-            self.distance += newRoute.distance
+        res = None
+        if insertRoute != None:
+            route = self.getWritableRoute(insertRoute)
+            res = route.addRequest(request, prevNode_index, afterNode_index)
+        if res is None:
+            nodeList = [self.problem.depot.nodeID, request.pickUpLoc.nodeID, request.deliveryLoc.nodeID,
+                        self.problem.depot.nodeID]
+            route = Route(nodeList, {request}, self.problem)
+            self.routes.append(route)
+            self.ownedRoutes.add(route)
+            self.distance += route.distance
         else:
-            for route in self.routes:
-                if route == insertRoute:
-                    res = route.addRequest(request, prevNode_index, afterNode_index)
-                    if res == -1:
-                        locList = [self.problem.depot, request.pickUpLoc, request.deliveryLoc, self.problem.depot]
-                        newRoute = Route(locList, {request}, self.problem)
-                        self.routes.append(newRoute)
-                        self.distance += newRoute.distance
-                    else:
-                        self.distance += res
-        # update lists with served and unserved requests
-        self.served.append(request)
-        self.notServed.remove(request)
-        # update distance
-        # self.computeDistance()
+            self.distance += res
+        # update sets with served and unserved requests
+        self.served.add(request)
+        notServedIndex = self.notServed.remove(request)
+        self.requestIndex[request.ID] = (request, route)
+        self.setServed(request, True)
+        if self.journal is not None:
+            if res is None:
+                self.journal.append(('newRoute', route, request, notServedIndex))
+            else:
+                self.journal.append(('add', route, request, prevNode_index, afterNode_index, notServedIndex))
+
+    def removeRoute(self, route):
+        """
+        Method that removes a route without requests from the solution
+        """
+        index = self.routes.index(route)
+        del self.routes[index]
+        if self.journal is not None:
+            self.journal.append(('removeRoute', route, index))
+
+    def setServed(self, request, served):
+        """
+        Method that marks the pickup and delivery of a request as served or not served
+        """
+        self.servedMask[request.pickUpLoc.nodeID] = served
+        self.servedMask[request.deliveryLoc.nodeID] = served
+
+    def getRequest(self, requestID):
+        """
+        Method that returns the request with the given ID
+        """
+        return self.problem.requestsByID[requestID]
+
+    def getWritableRoute(self, route):
+        """
+        Method that returns a version of a route of the solution that can be modified.
+        Routes are shared with copies of the solution, so a shared route is first
+        replaced by a private copy.
+        """
+        if route in self.ownedRoutes:
+            return route
+        routeCopy = route.copy()
+        index = self.routes.index(route)
+        self.routes[index] = routeCopy
+        self.ownedRoutes.add(routeCopy)
+        for request in routeCopy.requests:
+            self.requestIndex[request.ID] = (request, routeCopy)
+        if self.journal is not None:
+            self.journal.append(('replaceRoute', route, index, routeCopy))
+        return routeCopy
+
+    def startJournal(self, validate = False):
+        """
+        Method that starts recording the changes to the solution, so that they can
+        be rolled back in time proportional to the number of changes
+
+        Parameters
+        ----------
+        validate : boolean
+            if True, rollback checks the rolled-back solution against the solution
+            at the start of the journal and against a fresh recompute
+        """
+        self.journal = list()
+        self.journalDistance = self.distance
+        self.journalSignature = self.signature() if validate else None
+
+    def commitJournal(self):
+        """
+        Method that keeps the changes since startJournal and stops recording
+        """
+        self.journal = None
+
+    def rollback(self):
+        """
+        Method that undoes all changes since startJournal, in reverse order, and stops recording
+        """
+        journal = self.journal
+        self.journal = None
+        for entry in reversed(journal):
+            if entry[0] == 'remove':
+                _, route, request, pickUpIndex, deliveryIndex, servedIndex = entry
+                route.insertRequest(request, pickUpIndex, deliveryIndex)
+                self.notServed.pop()
+                self.served.restore(request, servedIndex)
+                self.requestIndex[request.ID] = (request, route)
+                self.setServed(request, True)
+            elif entry[0] == 'add':
+                _, route, request, _, _, notServedIndex = entry
+                route.removeRequest(request)
+                self.served.pop()
+                self.notServed.restore(request, notServedIndex)
+                self.requestIndex[request.ID] = (request, None)
+                self.setServed(request, False)
+            elif entry[0] == 'newRoute':
+                _, route, request, notServedIndex = entry
+                self.routes.pop()
+                self.ownedRoutes.discard(route)
+                self.served.pop()
+                self.notServed.restore(request, notServedIndex)
+                self.requestIndex[request.ID] = (request, None)
+                self.setServed(request, False)
+            elif entry[0] == 'removeRoute':
+                _, route, index = entry
+                self.routes.insert(index, route)
+            elif entry[0] == 'replaceRoute':
+                # the original route was shared and therefore never modified
+                _, route, index, routeCopy = entry
+                self.routes[index] = route
+                self.ownedRoutes.discard(routeCopy)
+                for request in route.requests:
+                    self.requestIndex[request.ID] = (request, route)
+        self.distance = self.journalDistance
+
+        if self.journalSignature is not None:
+            if self.signature() != self.journalSignature:
+                raise Exception("Rolled-back solution differs from the solution before the changes")
+            self.checkConsistency()
+
+    def signature(self):
+        """
+        Method that returns the routes, the order of the served and unserved requests
+        and the distance of the solution, to compare solutions
+        """
+        return ([route.nodes.tolist() for route in self.routes], [req.ID for req in self.served],
+                [req.ID for req in self.notServed], self.distance)
+
+    def checkConsistency(self):
+        """
+        Method that checks the cached route schedules, the distance and the lists with
+        served and unserved requests against a fresh recompute. Raises an exception
+        if they are inconsistent.
+        """
+        for route in self.routes:
+            fresh = Route(route.nodes, route.requests.copy(), self.problem)
+            if not fresh.feasible:
+                raise Exception("Infeasible route in the solution")
+            for attribute in ('arrivalTimes', 'servStartTimes', 'waitingTimes', 'forwardSlack', 'loads',
+                              'prefixDistances', 'distance'):
+                if getattr(fresh, attribute) != getattr(route, attribute):
+                    raise Exception("Cached " + attribute + " of a route differs from a fresh recompute")
+            # the distance is kept up to date incrementally, it is checked against the sum over all arcs
+            if route.computeDistance() != route.distance:
+                raise Exception("Distance of a route differs from the sum of the distances of its arcs")
+        servedInRoutes = sorted(req.ID for route in self.routes for req in route.requests)
+        if servedInRoutes != sorted(req.ID for req in self.served):
+            raise Exception("Served requests differ from the requests in the routes")
+        if len(set(servedInRoutes) | set(req.ID for req in self.notServed)) != len(self.problem.requests):
+            raise Exception("Served and unserved requests do not cover all requests")
+        for route in self.routes:
+            for request in route.requests:
+                if self.requestIndex[request.ID] != (request, route):
+                    raise Exception("Request index differs from the requests in the routes")
+        for request in self.notServed:
+            if self.requestIndex[request.ID] != (request, None):
+                raise Exception("Request index differs from the unserved requests")
+        servedMask = np.zeros(len(self.problem.nodes), dtype = bool)
+        for route in self.routes:
+            servedMask[route.nodes[1:-1]] = True
+        if not np.array_equal(servedMask, self.servedMask):
+            raise Exception("Served nodes differ from the nodes in the routes")
+        if abs(sum(route.distance for route in self.routes) - self.distance) > 1e-6:
+            raise Exception("Distance of the solution differs from the distance of its routes")
 
     def copy(self):
         """
         Method that creates a copy of the solution and returns it
         """
-        # need a deep copy of routes because routes are modifiable
-        routesCopy = list()
-        for route in self.routes:
-            routesCopy.append(route.copy())
-        copy = Solution(self.problem, routesCopy, self.served.copy(), self.notServed.copy())
+        # the constructor rebuilds the indexes from the routes, a copy takes them over instead
+        copy = Solution.__new__(Solution)
+        copy.problem = self.problem
+        copy.routes = self.routes.copy()
+        copy.served = self.served.copy()
+        copy.notServed = self.notServed.copy()
+        copy.requestIndex = dict(self.requestIndex)
+        copy.servedMask = self.servedMask.copy()
+        copy.journal = None
+        # the distance can include noise (computeDistanceWithNoise), the copy gets the distance of its routes
         copy.computeDistance()
+        # the routes are shared copy-on-write, so neither solution may modify them in place anymore
+        copy.ownedRoutes = set()
+        self.ownedRoutes = set()
         return copy
 
     def executeRandomInsertion(self, randomGen):
@@ -186,27 +365,31 @@ class Solution:
                 # pick a random route
                 randomRoute = randomGen.choice(potentialRoutes)
 
-                afterInsertion, cost = randomRoute.greedyInsert(req)
-                if afterInsertion == None:
+                cost, preNode_index, afterNode_index = randomRoute.findBestInsertion(req)
+                if preNode_index == None:
                     # insertion not feasible, remove route from potential routes
                     potentialRoutes.remove(randomRoute)
                 else:
-                    # insertion feasible, update routes and break from while loop
+                    # insertion feasible, update the route and break from while loop
                     inserted = True
-                    # print("Possible")
-                    self.routes.remove(randomRoute)
-                    self.routes.append(afterInsertion)
-                    self.distance += cost
+                    self.addRequest(req, randomRoute, preNode_index, afterNode_index)
                     break
 
-            # if we were not able to insert, create a new route
+            # if we were not able to insert, create a new route with the request
             if not inserted:
-                # create a new route with the request
-                locList = [self.problem.depot, req.pickUpLoc, req.deliveryLoc, self.problem.depot]
-                newRoute = Route(locList, {req}, self.problem)
-                self.routes.append(newRoute)
-                self.distance += newRoute.distance
-            # update the lists with served and notServed requests
-            self.served.append(req)
-            self.notServed.remove(req)
-        # self.computeDistance()
+                self.addRequest(req, None, 0, 0)
+
+
+def buildSolution(problem, routeNodes):
+    """
+    Function that creates a solution from the node lists of its routes
+    """
+    routes = []
+    served = []
+    for nodes in routeNodes:
+        requests = {problem.requestsByID[int(problem.requestID[node])] for node in nodes[1:-1]}
+        routes.append(Route(nodes, requests, problem))
+        served.extend(sorted(requests, key = lambda request: request.ID))
+    servedIDs = {request.ID for request in served}
+    notServed = [request for request in problem.requests if request.ID not in servedIDs]
+    return Solution(problem, routes, served, notServed)
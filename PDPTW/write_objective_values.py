@@ -0,0 +1,9 @@
+import sys
+
+from reporting import writeObjectiveValues
+
+'''Offline tool that writes the objective values of the history written by ALNS.execute to
+Objective values.xlsx: python write_objective_values.py [history.npz]'''
+
+if __name__ == '__main__':
+    writeObjectiveValues(sys.argv[1] if len(sys.argv) > 1 else 'history.npz')